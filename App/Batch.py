@@ -0,0 +1,187 @@
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+import csv
+import json
+import os
+import sys
+import time
+
+import Logic
+from Dataset import load_dataset
+
+CSV_FIELDS = ("index", "id", "req", "status", "elapsed_ms", "airport", "degree", "distance", "time", "stops", "path", "error")
+
+MST_CATEGORIES = {3: "commercial", 4: "cargo", 5: "military"}
+
+# Queries sent to a worker at a time
+CHUNK_SIZE = 64
+
+def read_queries(file_path: str):
+    """
+    Yields the queries of a JSON-lines file (one object per line) or a CSV file (semicolon separated, with
+    a header row naming the query fields), depending on the file's extension. A query has an optional "id",
+    the requirement "req" (1-7) and that requirement's arguments: "origin_lat", "origin_lon",
+    "destination_lat", "destination_lon", "top", "metric" or "algorithm". Decimal commas are accepted, as in
+    the data files.
+    """
+    with open(file_path, 'r', newline='') as file:
+        if file_path.endswith(".csv"):
+            for row in csv.DictReader(file, delimiter=';'):
+                yield {field: value for field, value in row.items() if value not in (None, "")}
+        else:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+def run_query(query: dict) -> dict:
+    """
+    Answers one query with the Logic functions behind the console's requirements and returns a
+    JSON-serializable result. The data must already be loaded.
+    """
+    req = int(query["req"])
+
+    if req in (1, 2):
+        path, distance, time = Logic.find_path(*_coordinates(query), bidirectional=True)
+        return {"path": [step[0] for step in path], "distance": distance, "time": time, "stops": max(len(path) - 1, 0)}
+
+    if req in MST_CATEGORIES:
+        branches, airport, degree, distance, trayects, time = Logic.find_mst(MST_CATEGORIES[req], query.get("algorithm", "auto"))
+        return {
+            "airport": airport.icao, "degree": degree, "distance": distance, "time": time, "trayects": trayects,
+            "branches": [[step[0] for step in branch] for branch in branches],
+        }
+
+    if req == 6:
+        icao, degree, branches, distance, time = Logic.top_n_mst(int(query["top"]))
+        return {
+            "airport": icao, "degree": degree, "distance": distance, "time": time,
+            "branches": [[step[0] for step in branch] for branch in branches],
+        }
+
+    if req == 7:
+        stats = {}
+        path, distance, time = Logic.shortest_path(*_coordinates(query), metric=query.get("metric", "duration"), stats=stats)
+        route = [path[0][0]] + [step[1] for step in path] if path else []
+        return {"path": route, "distance": distance, "time": time, "stops": len(path), "algorithm": stats.get("algorithm")}
+
+    raise ValueError(f"Requerimiento no válido: {req}")
+
+def run_timed(index: int, query: dict) -> dict:
+    """
+    Runs a query and wraps its result (or error) with its position in the input and its run time. Any
+    exception the query raises is recorded as that query's error, so one bad line never stops the batch.
+    """
+    record = {"index": index, "id": query.get("id"), "req": query.get("req")}
+    start = time.perf_counter()
+    try:
+        record["result"] = run_query(query)
+        record["status"] = "ok"
+    except Exception as error:
+        record["status"] = "error"
+        record["error"] = f"{type(error).__name__}: {error}"
+    record["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    return record
+
+def load_flights(airports_file: str, flights_file: str, flights_dir: str = None, partitions: list = None, processes: int = None) -> None:
+    """
+    Loads the data the queries run on: the flights of flights_file, or, when flights_dir is given, its
+    partition files selected by partitions (see Dataset.load_dataset).
+    """
+    if flights_dir is None:
+        Logic.load_data(airports_file, flights_file)
+    else:
+        load_dataset(airports_file, flights_dir, partitions, processes)
+
+def run_queries(queries, airports_file: str, flights_file: str, processes: int = None, flights_dir: str = None, partitions: list = None):
+    """
+    Yields the records of the queries in input order, with the given data files (or flight partitions, see
+    load_flights) loaded. With more than one process the queries are sent in chunks to a process pool,
+    keeping a bounded number of chunks in flight so the input is streamed.
+    """
+    load_flights(airports_file, flights_file, flights_dir, partitions, processes)
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    if processes <= 1:
+        for index, query in enumerate(queries):
+            yield run_timed(index, query)
+        return
+
+    with ProcessPoolExecutor(processes, initializer=init_worker, initargs=(airports_file, flights_file, dict(Logic.loaded_key), flights_dir, partitions)) as executor:
+        pending = deque()
+        for chunk in _chunks(enumerate(queries), CHUNK_SIZE):
+            pending.append(executor.submit(_run_chunk, chunk))
+            if len(pending) >= processes * 4:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+def run_batch(queries_file: str, output_file: str, airports_file: str, flights_file: str, processes: int = None, flights_dir: str = None, partitions: list = None) -> dict:
+    """
+    Loads the data once, runs every query of the queries file and streams the records to the output file
+    (JSON lines, or semicolon-separated CSV when its name ends in .csv; "-" writes JSON lines to stdout).
+    Returns a summary with the number of queries, errors and the total time.
+    """
+    start = time.perf_counter()
+    summary = {"queries": 0, "errors": 0}
+    output = sys.stdout if output_file == "-" else open(output_file, 'w', newline='')
+    try:
+        write = _csv_writer(output) if output_file.endswith(".csv") else _json_writer(output)
+        for record in run_queries(read_queries(queries_file), airports_file, flights_file, processes, flights_dir, partitions):
+            summary["queries"] += 1
+            summary["errors"] += record["status"] == "error"
+            write(record)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    summary["elapsed_s"] = round(time.perf_counter() - start, 3)
+    return summary
+
+def _coordinates(query: dict) -> tuple:
+    return tuple(
+        _number(query[field]) for field in ("origin_lat", "origin_lon", "destination_lat", "destination_lon")
+    )
+
+def _number(value) -> float:
+    if isinstance(value, str):
+        value = value.replace(",", ".")
+    return float(value)
+
+def _chunks(items, size: int):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _json_writer(output):
+    def write(record: dict) -> None:
+        output.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return write
+
+def _csv_writer(output):
+    writer = csv.writer(output, delimiter=';')
+    writer.writerow(CSV_FIELDS)
+
+    def write(record: dict) -> None:
+        result = record.get("result", {})
+        row = dict(record, **result)
+        row["path"] = "-".join(result.get("path", []))
+        writer.writerow(["" if row.get(field) is None else row[field] for field in CSV_FIELDS])
+    return write
+
+def init_worker(airports_file: str, flights_file: str, key: dict, flights_dir: str = None, partitions: list = None) -> None:
+    """
+    Pool initializer that makes a worker answer queries on the data identified by key (Logic.loaded_key).
+    Forked workers inherit the parent's graphs; spawned ones load the data, from the snapshot or the partition
+    cache when it is current.
+    """
+    if Logic.loaded_key != key:
+        load_flights(airports_file, flights_file, flights_dir, partitions, 1)
+
+def _run_chunk(chunk: list) -> list:
+    return [run_timed(index, query) for index, query in chunk]
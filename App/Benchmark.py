@@ -0,0 +1,297 @@
+from statistics import median
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import Logic
+
+SYNTHETIC_DIR = "Data/synthetic"
+
+PLANE_TYPES = ("A320", "A319", "B738", "AT45", "AT43", "E190", "B190", "C208", "PA34", "BE9L", "C295", "H60")
+FLIGHT_TYPES = ("AVIACION_COMERCIAL", "AVIACION_CARGA", "MILITAR")
+COUNTRIES = ("Colombia", "Panama", "Ecuador", "Peru", "Brazil", "Venezuela", "Mexico", "United States", "Spain")
+
+# Rows written per batch while generating flights
+BATCH_SIZE = 100000
+
+def generate_airports(file_path: str, count: int, seed: int = 0) -> list:
+    """
+    Writes a synthetic airport CSV in the format of the 2022 file (semicolon separated, decimal commas)
+    and returns the (icao, city, latitude, longitude) of every airport. About a third of the airports
+    are in Colombia; the same seed always produces the same file.
+    """
+    generator = random.Random(seed)
+    generated = []
+
+    with open(file_path, 'w') as file:
+        file.write("NOMBRE;CIUDAD;PAIS;ICAO;LATITUD;LONGITUD;ALTITUD\n")
+        for i in range(count):
+            icao = _icao(i)
+            if generator.random() < 1 / 3:
+                country = "Colombia"
+                lat, lon = generator.uniform(-4.2, 12.5), generator.uniform(-79, -67)
+            else:
+                country = generator.choice(COUNTRIES[1:])
+                lat, lon = generator.uniform(-55, 60), generator.uniform(-120, 30)
+            city = f"City {icao}"
+            altitude = generator.randint(0, 9000)
+            file.write(f"Synthetic Airport {icao};{city};{country};{icao};{_decimal(lat)};{_decimal(lon)};{altitude}\n")
+            generated.append((icao, city, lat, lon))
+
+    return generated
+
+def generate_flights(file_path: str, airports: list, count: int, seed: int = 0) -> None:
+    """
+    Writes a synthetic flight CSV in the format of the 2022 file. Origins and destinations follow a
+    Zipf-like popularity, so a few hubs concentrate most of the traffic as in the real data, and each
+    flight's duration grows with the great-circle distance of its route.
+    """
+    generator = random.Random(seed + 1)
+    weights = [1 / (rank + 1) ** 0.8 for rank in range(len(airports))]
+    generator.shuffle(weights)
+    positions = {airport[0]: i for i, airport in enumerate(airports)}
+    cumulative = []
+    total = 0
+    for weight in weights:
+        total += weight
+        cumulative.append(total)
+
+    with open(file_path, 'w') as file:
+        file.write("ORIGEN;CIUDAD_ORIGEN;DESTINO;CIUDAD_DESTINO;TIPO_AERONAVE;TRAFICO;TIPO_VUELO;TIEMPO_VUELO\n")
+        written = 0
+        while written < count:
+            size = min(BATCH_SIZE, count - written)
+            origins = generator.choices(airports, cum_weights=cumulative, k=size)
+            destinations = generator.choices(airports, cum_weights=cumulative, k=size)
+            lines = []
+            for origin, destination in zip(origins, destinations):
+                if origin is destination:
+                    destination = airports[(positions[origin[0]] + 1) % len(airports)]
+                distance = Logic.haversine((origin[2], origin[3]), (destination[2], destination[3]))
+                duration = int(distance / 12) + generator.randint(15, 45)
+                traffic = "N" if origin[1] == destination[1] or generator.random() < 0.7 else "I"
+                lines.append(
+                    f"{origin[0]};{origin[1].upper()};{destination[0]};{destination[1].upper()};"
+                    f"{generator.choice(PLANE_TYPES)};{traffic};{generator.choice(FLIGHT_TYPES)};{duration}\n"
+                )
+            file.writelines(lines)
+            written += size
+
+def generate_dataset(directory: str, airports: int, flights: int, seed: int = 0) -> tuple:
+    """
+    Generates an airport file and a flight file in directory, named after their sizes and seed, and
+    returns their paths. Files that already exist are reused, since the same seed yields the same data.
+    """
+    os.makedirs(directory, exist_ok=True)
+    airports_file = os.path.join(directory, f"airports-{airports}-{seed}.csv")
+    flights_file = os.path.join(directory, f"flights-{airports}-{flights}-{seed}.csv")
+
+    if not os.path.exists(airports_file) or not os.path.exists(flights_file):
+        generated = generate_airports(airports_file, airports, seed)
+        generate_flights(flights_file, generated, flights, seed)
+
+    return airports_file, flights_file
+
+def run_benchmarks(airports_file: str, flights_file: str, repeat: int = 3, seed: int = 0, queries: int = 20, top: int = 50, only: list = None) -> dict:
+    """
+    Times the hot paths of Logic and Graph on the given files and returns a JSON-serializable report.
+    Each benchmark runs repeat times after its setup, plus once more under tracemalloc to measure the
+    peak memory it allocates. Benchmarks that return a dict of counters, like the nodes a search
+    expanded, have them added to their result.
+    """
+    report = {"meta": _meta(airports_file, flights_file, repeat, seed), "results": {}}
+
+    for name, setup, run in _benchmarks(airports_file, flights_file, seed, queries, top):
+        if only and name not in only:
+            # Still run it once, untimed, so the benchmarks after it find the state they expect
+            setup()
+            run()
+            continue
+
+        timings = []
+        for _ in range(repeat):
+            setup()
+            start = time.perf_counter()
+            counters = run()
+            timings.append(time.perf_counter() - start)
+
+        setup()
+        tracemalloc.start()
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        report["results"][name] = {
+            "repeats": repeat,
+            "min_s": min(timings),
+            "median_s": median(timings),
+            "peak_kib": round(peak / 1024, 1),
+        }
+        if isinstance(counters, dict):
+            report["results"][name].update(counters)
+
+    return report
+
+def compare(baseline: dict, current: dict, threshold: float = 0.2) -> list:
+    """
+    Compares two benchmark reports. Returns (name, baseline seconds, current seconds, time ratio,
+    memory ratio, regressed) for every benchmark in both, where regressed means the best time or
+    the peak memory grew by more than threshold.
+    """
+    rows = []
+    for name, base in baseline["results"].items():
+        if name not in current["results"]:
+            continue
+        new = current["results"][name]
+        time_ratio = new["min_s"] / base["min_s"] if base["min_s"] else 1.0
+        memory_ratio = new["peak_kib"] / base["peak_kib"] if base["peak_kib"] else 1.0
+        regressed = time_ratio > 1 + threshold or memory_ratio > 1 + threshold
+        rows.append((name, base["min_s"], new["min_s"], time_ratio, memory_ratio, regressed))
+    return rows
+
+def _benchmarks(airports_file: str, flights_file: str, seed: int, queries: int, top: int) -> list:
+    # (name, setup, run) in dependency order: each setup leaves the state the following benchmarks need
+    state = {}
+
+    def nothing():
+        pass
+
+    def clear_all():
+        Logic._clear_data()
+
+    def load_airports():
+        Logic._clear_data()
+        Logic.read_airports(airports_file)
+
+    def clear_graphs():
+        Logic.compact_graphs.clear()
+        Logic.network.clear()
+
+    def pick_pairs():
+        vertices = Logic.commercial_digraph.get_vertices()
+        generator = random.Random(seed)
+        state["pairs"] = [(generator.choice(vertices), generator.choice(vertices)) for _ in range(queries)]
+        state["root"] = Logic.find_max_degree(Logic.commercial_graph)[0]
+
+    def build_mst():
+        state["mst"] = Logic.commercial_graph.prim(state["root"])[0]
+
+    def search_distance(search):
+        # Shortest distance between every pair, totalling the nodes the search expanded
+        expanded = 0
+        for start, end in state["pairs"]:
+            stats = {}
+            search(start, end, stats)
+            expanded += stats["expanded"]
+        return {"expanded": expanded}
+
+    return [
+        ("read_airports", clear_all, lambda: Logic.read_airports(airports_file)),
+        ("read_flights", load_airports, lambda: Logic.read_flights(flights_file)),
+        ("build_graphs", clear_graphs, Logic.build_graphs),
+        ("stream_flights", load_airports, lambda: Logic.stream_flights(flights_file)),
+        ("get_top_airports", pick_pairs, lambda: (Logic.get_top_airports(Logic.general_digraph, top), Logic.get_bottom_airports(Logic.general_digraph, top))),
+        ("bfs_path", nothing, lambda: [Logic.commercial_digraph.bfs_path(start, goal) for start, goal in state["pairs"]]),
+        ("dijkstra", nothing, lambda: [Logic.commercial_digraph.dijkstra(start, end) for start, end in state["pairs"]]),
+        ("dijkstra_distance", nothing, lambda: search_distance(lambda start, end, stats: Logic.commercial_digraph.dijkstra(start, end, 0, stats))),
+        ("astar", nothing, lambda: search_distance(lambda start, end, stats: Logic.commercial_digraph.astar(start, end, Logic.distance_heuristic(end), 0, stats))),
+        ("prim", nothing, lambda: Logic.commercial_graph.prim(state["root"])),
+        ("find_branches", build_mst, lambda: state["mst"].find_branches(state["root"])),
+        ("top_n_mst", nothing, lambda: list(Logic.top_n_mst(top)[2])),
+    ]
+
+def _meta(airports_file: str, flights_file: str, repeat: int, seed: int) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "airports_file": airports_file,
+        "flights_file": flights_file,
+        "airports_bytes": os.path.getsize(airports_file),
+        "flights_bytes": os.path.getsize(flights_file),
+        "repeat": repeat,
+        "seed": seed,
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+def _icao(index: int) -> str:
+    letters = []
+    for _ in range(4):
+        index, letter = divmod(index, 26)
+        letters.append(chr(ord("A") + letter))
+    return "".join(reversed(letters))
+
+def _decimal(value: float) -> str:
+    return f"{value:.6f}".replace(".", ",")
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Synthetic scale benchmarks for the analyzer")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="write a synthetic airport and flight CSV")
+    run = commands.add_parser("run", help="run the benchmarks and write a JSON report")
+    for command in (generate, run):
+        command.add_argument("--airports", type=int, default=1000, help="number of synthetic airports")
+        command.add_argument("--flights", type=int, default=100000, help="number of synthetic flights")
+        command.add_argument("--seed", type=int, default=0)
+        command.add_argument("--directory", default=SYNTHETIC_DIR, help="where the synthetic files are kept")
+    run.add_argument("--airports-file", help="benchmark this airport file instead of synthetic data")
+    run.add_argument("--flights-file", help="benchmark this flight file instead of synthetic data")
+    run.add_argument("--repeat", type=int, default=3)
+    run.add_argument("--queries", type=int, default=20, help="origin/destination pairs for bfs_path and dijkstra")
+    run.add_argument("--top", type=int, default=50, help="top airports for get_top_airports and top_n_mst")
+    run.add_argument("--only", nargs="*", help="benchmark names to run")
+    run.add_argument("--output", default="-", help="report file (- for stdout)")
+
+    compare_command = commands.add_parser("compare", help="compare two reports and fail on regressions")
+    compare_command.add_argument("baseline")
+    compare_command.add_argument("current")
+    compare_command.add_argument("--threshold", type=float, default=0.2, help="allowed relative slowdown or memory growth")
+
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        for file_path in generate_dataset(args.directory, args.airports, args.flights, args.seed):
+            print(file_path)
+        return 0
+
+    if args.command == "run":
+        if args.airports_file and args.flights_file:
+            airports_file, flights_file = args.airports_file, args.flights_file
+        else:
+            airports_file, flights_file = generate_dataset(args.directory, args.airports, args.flights, args.seed)
+        report = run_benchmarks(airports_file, flights_file, args.repeat, args.seed, args.queries, args.top, args.only)
+        output = json.dumps(report, indent=2)
+        if args.output == "-":
+            print(output)
+        else:
+            with open(args.output, 'w') as file:
+                file.write(output + "\n")
+        return 0
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    with open(args.current) as file:
+        current = json.load(file)
+    rows = compare(baseline, current, args.threshold)
+    print(f"{'BENCHMARK':<22}{'BASELINE_S':>12}{'CURRENT_S':>12}{'TIME':>8}{'MEMORY':>8}")
+    for name, base, new, time_ratio, memory_ratio, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<22}{base:>12.4f}{new:>12.4f}{time_ratio:>8.2f}{memory_ratio:>8.2f}{flag}")
+    return 1 if any(row[-1] for row in rows) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
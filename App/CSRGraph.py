@@ -0,0 +1,414 @@
+from array import array
+from bisect import bisect_right
+from collections import deque
+import hashlib
+import heapq
+
+from Graph import Graph
+
+class CSRGraph:
+    """
+    Read-only graph stored in compressed sparse row form.
+
+    ICAO codes are interned to dense integer ids (assigned in sorted ICAO order, so
+    integer tie-breaks in the heaps match the string tie-breaks of Graph). The
+    neighbors of vertex i are neighbors[offsets[i]:offsets[i + 1]], with the matching
+    weights in distances and durations, kept in first-insertion order. The reverse rows
+    hold, for directed graphs built from a Graph, the predecessors of vertex i in
+    in_neighbors[in_offsets[i]:in_offsets[i + 1]] and the ids of their edges in in_edges.
+    """
+
+    def __init__(self, directed=True):
+        self.directed = directed
+        self.ids = {}
+        self.labels = []
+        self.offsets = array('q', [0])
+        self.neighbors = array('q')
+        self.distances = array('d')
+        self.durations = array('q')
+        self.in_offsets = array('q', [0])
+        self.in_neighbors = array('q')
+        self.in_edges = array('q')
+
+    @classmethod
+    def from_graph(cls, graph: Graph):
+        """
+        Builds the compact copy of an existing Graph, preserving its neighbor order.
+        """
+        csr = cls(graph.directed)
+        csr.labels = sorted(graph.get_vertices())
+        csr.ids = {label: i for i, label in enumerate(csr.labels)}
+        # Edge id of every (tail, head) pair, to point the reverse rows at the edges
+        edges = {}
+        for i, label in enumerate(csr.labels):
+            for neighbor, (weight1, weight2) in graph.get_neighbors(label).items():
+                edges[i, csr.ids[neighbor]] = len(csr.neighbors)
+                csr.neighbors.append(csr.ids[neighbor])
+                csr.distances.append(weight1)
+                csr.durations.append(weight2)
+            csr.offsets.append(len(csr.neighbors))
+
+        if csr.directed:
+            for i, label in enumerate(csr.labels):
+                for predecessor in graph.get_predecessors(label):
+                    j = csr.ids[predecessor]
+                    csr.in_neighbors.append(j)
+                    csr.in_edges.append(edges[j, i])
+                csr.in_offsets.append(len(csr.in_neighbors))
+        return csr
+
+    def fingerprint(self) -> str:
+        """
+        Returns a hash of the graph's content, which changes whenever a vertex, an edge or a weight does.
+        """
+        digest = hashlib.sha256()
+        digest.update(repr((self.directed, self.labels)).encode("utf-8"))
+        for data in (self.offsets, self.neighbors, self.distances, self.durations):
+            digest.update(data.tobytes())
+        return digest.hexdigest()
+
+    def has_vertex(self, vertex: str) -> bool:
+        return vertex in self.ids
+
+    def get_vertices(self) -> list:
+        return list(self.labels)
+
+    def get_neighbors(self, vertex: str) -> dict:
+        i = self.ids[vertex]
+        return {
+            self.labels[self.neighbors[e]]: (self.distances[e], self.durations[e])
+            for e in range(self.offsets[i], self.offsets[i + 1])
+        }
+
+    def get_weight(self, vertex1: str, vertex2: str) -> tuple:
+        if vertex1 not in self.ids or vertex2 not in self.ids:
+            return None
+        i, j = self.ids[vertex1], self.ids[vertex2]
+        for e in range(self.offsets[i], self.offsets[i + 1]):
+            if self.neighbors[e] == j:
+                return (self.distances[e], self.durations[e])
+        return None
+
+    def get_outdegree(self, vertex: str) -> int:
+        if vertex in self.ids:
+            i = self.ids[vertex]
+            return self.offsets[i + 1] - self.offsets[i]
+        else:
+            return 0
+
+    #===========================================================================
+    # ALGORITHMS
+    #===========================================================================
+
+    def bfs_path(self, start: str, goal: str) -> list:
+        if start not in self.ids or goal not in self.ids:
+            return []
+
+        offsets, neighbors = self.offsets, self.neighbors
+        source, target = self.ids[start], self.ids[goal]
+
+        if source == target:
+            for e in range(offsets[source], offsets[source + 1]):
+                if neighbors[e] == source:
+                    return [(start, (0, 0)), (start, (self.distances[e], self.durations[e]))]
+            return []
+
+        parent_edge = {source: -1}
+        queue = deque([source])
+
+        while queue:
+            vertex = queue.popleft()
+            for e in range(offsets[vertex], offsets[vertex + 1]):
+                next_vertex = neighbors[e]
+                if next_vertex in parent_edge:
+                    continue
+                parent_edge[next_vertex] = e
+                if next_vertex == target:
+                    return self._edge_path(parent_edge, source, target)
+                queue.append(next_vertex)
+
+        return []
+
+    def _edge_tail(self, e: int) -> int:
+        # The tail of edge e is the vertex whose offset range contains it
+        return bisect_right(self.offsets, e) - 1
+
+    def _edge(self, tail: int, head: int) -> int:
+        # The id of the edge from tail to head (there is at most one per pair), or -1
+        for e in range(self.offsets[tail], self.offsets[tail + 1]):
+            if self.neighbors[e] == head:
+                return e
+        return -1
+
+    def _edge_path(self, parent_edge: dict, source: int, target: int) -> list:
+        path = []
+        current = target
+        while current != source:
+            e = parent_edge[current]
+            path.append((self.labels[current], (self.distances[e], self.durations[e])))
+            current = self._edge_tail(e)
+        path.append((self.labels[source], (0, 0)))
+        path.reverse()
+        return path
+
+    def prim(self, start_vertex: str):
+        if start_vertex not in self.ids:
+            raise ValueError("El vértice inicial no está en el grafo.")
+
+        offsets, neighbors = self.offsets, self.neighbors
+        distances, durations = self.distances, self.durations
+        labels = self.labels
+        start = self.ids[start_vertex]
+
+        mst = Graph(directed=self.directed)
+        mst.add_vertex(start_vertex)
+
+        visited = bytearray(len(labels))
+        visited[start] = 1
+
+        edges = [
+            (distances[e], durations[e], start, neighbors[e])
+            for e in range(offsets[start], offsets[start + 1])
+        ]
+        heapq.heapify(edges)
+
+        total_cost_weight1 = 0
+        total_cost_weight2 = 0
+
+        while edges:
+            weight1, weight2, vertex1, vertex2 = heapq.heappop(edges)
+
+            if not visited[vertex2]:
+                visited[vertex2] = 1
+                mst.add_vertex(labels[vertex2])
+                mst.add_edge(labels[vertex1], labels[vertex2], weight1, weight2)
+                total_cost_weight1 += weight1
+                total_cost_weight2 += weight2
+
+                for e in range(offsets[vertex2], offsets[vertex2 + 1]):
+                    if not visited[neighbors[e]]:
+                        heapq.heappush(edges, (distances[e], durations[e], vertex2, neighbors[e]))
+
+        return mst, total_cost_weight1, total_cost_weight2
+
+    def dijkstra(self, start: str, end: str, stats: dict = None):
+        if start not in self.ids or end not in self.ids:
+            raise ValueError("Los vértices inicial y/o final no están en el grafo.")
+
+        offsets, neighbors = self.offsets, self.neighbors
+        weights1, weights2 = self.distances, self.durations
+        source, target = self.ids[start], self.ids[end]
+
+        distances = array('d', [float('inf')]) * len(self.labels)
+        distances[source] = 0
+        previous = array('q', [-1]) * len(self.labels)
+        expanded = 0
+        pushes = 1
+        relaxed = 0
+
+        priority_queue = [(0, source)]
+
+        while priority_queue:
+            current_distance, current_vertex = heapq.heappop(priority_queue)
+
+            if current_vertex == target:
+                break
+
+            if current_distance > distances[current_vertex]:
+                continue
+            expanded += 1
+
+            relaxed += offsets[current_vertex + 1] - offsets[current_vertex]
+            for e in range(offsets[current_vertex], offsets[current_vertex + 1]):
+                neighbor = neighbors[e]
+                distance = current_distance + weights2[e]
+
+                if distance < distances[neighbor]:
+                    distances[neighbor] = distance
+                    previous[neighbor] = e
+                    heapq.heappush(priority_queue, (distance, neighbor))
+                    pushes += 1
+
+        if stats is not None:
+            stats["algorithm"] = "dijkstra"
+            stats["expanded"] = expanded
+            stats["pushes"] = pushes
+            stats["relaxed"] = relaxed
+
+        # Reconstruir el camino a partir de las aristas previas
+        path = [end]
+        path_weights = []
+        current = target
+        while previous[current] != -1:
+            e = previous[current]
+            path_weights.append((weights1[e], weights2[e]))
+            current = self._edge_tail(e)
+            path.append(self.labels[current])
+        path.reverse()
+        path_weights.reverse()
+
+        total_weight1 = sum(weight1 for weight1, weight2 in path_weights)
+        total_weight2 = sum(weight2 for weight1, weight2 in path_weights)
+
+        return path, path_weights, total_weight1, total_weight2
+
+    def bidirectional_dijkstra(self, start: str, end: str, stats: dict = None):
+        """
+        Fastest-duration route searched from both ends at once, forward from start and backward from end
+        over the reverse rows, with the same tie-breaking and result as Graph.bidirectional_dijkstra.
+        """
+        if start not in self.ids or end not in self.ids:
+            raise ValueError("Los vértices inicial y/o final no están en el grafo.")
+
+        weights1, weights2 = self.distances, self.durations
+        source, target = self.ids[start], self.ids[end]
+        # Side 0 searches forward over (offsets, neighbors, edge ids), side 1 backward over the reverse rows
+        if self.directed:
+            adjacency = ((self.offsets, self.neighbors, None), (self.in_offsets, self.in_neighbors, self.in_edges))
+        else:
+            adjacency = ((self.offsets, self.neighbors, None), (self.offsets, self.neighbors, None))
+
+        distances = (array('d', [float('inf')]) * len(self.labels), array('d', [float('inf')]) * len(self.labels))
+        distances[0][source] = 0
+        distances[1][target] = 0
+        previous = (array('q', [-1]) * len(self.labels), array('q', [-1]) * len(self.labels))
+        queues = ([(0, source)], [(0, target)])
+        best, meeting = (0, source) if source == target else (float('inf'), -1)
+        expanded = 0
+        pushes = 2
+        relaxed = 0
+
+        while queues[0] and queues[1]:
+            if queues[0][0][0] + queues[1][0][0] >= best:
+                break
+
+            side = 0 if queues[0][0][0] <= queues[1][0][0] else 1
+            current_distance, current_vertex = heapq.heappop(queues[side])
+            if current_distance > distances[side][current_vertex]:
+                continue
+            expanded += 1
+
+            offsets, neighbors, edges = adjacency[side]
+            own, other = distances[side], distances[1 - side]
+            relaxed += offsets[current_vertex + 1] - offsets[current_vertex]
+            for i in range(offsets[current_vertex], offsets[current_vertex + 1]):
+                neighbor = neighbors[i]
+                e = i if edges is None else edges[i]
+                distance = current_distance + weights2[e]
+
+                if distance < own[neighbor]:
+                    own[neighbor] = distance
+                    previous[side][neighbor] = e
+                    heapq.heappush(queues[side], (distance, neighbor))
+                    pushes += 1
+
+                if own[neighbor] + other[neighbor] < best:
+                    best = own[neighbor] + other[neighbor]
+                    meeting = neighbor
+
+        if stats is not None:
+            stats["algorithm"] = "bidirectional_dijkstra"
+            stats["expanded"] = expanded
+            stats["pushes"] = pushes
+            stats["relaxed"] = relaxed
+
+        if meeting == -1:
+            return [end], [], 0, 0
+
+        # Forward half from start to the meeting vertex, then the backward half on to end
+        path = [self.labels[meeting]]
+        path_weights = []
+        current = meeting
+        while previous[0][current] != -1:
+            e = previous[0][current]
+            path_weights.append((weights1[e], weights2[e]))
+            current = self._edge_tail(e)
+            path.append(self.labels[current])
+        path.reverse()
+        path_weights.reverse()
+
+        current = meeting
+        while previous[1][current] != -1:
+            e = previous[1][current]
+            path_weights.append((weights1[e], weights2[e]))
+            current = self.neighbors[e] if self.directed else self._edge_tail(e)
+            path.append(self.labels[current])
+
+        total_weight1 = sum(weight1 for weight1, weight2 in path_weights)
+        total_weight2 = sum(weight2 for weight1, weight2 in path_weights)
+
+        return path, path_weights, total_weight1, total_weight2
+
+    def shortest_tree(self, source: int):
+        """
+        One-to-all Dijkstra minimizing duration from the vertex with id source, with the same tie-breaking
+        as dijkstra. Returns (durations, distances, previous): the duration of each vertex's path, the
+        distance flown along it, and the id of the edge that reaches it (-1 for the source and unreachable
+        vertices).
+        """
+        offsets, neighbors = self.offsets, self.neighbors
+        weights1, weights2 = self.distances, self.durations
+
+        durations = array('d', [float('inf')]) * len(self.labels)
+        distances = array('d', [float('inf')]) * len(self.labels)
+        previous = array('i', [-1]) * len(self.labels)
+        durations[source] = 0
+        distances[source] = 0
+
+        priority_queue = [(0, source)]
+
+        while priority_queue:
+            current_duration, current_vertex = heapq.heappop(priority_queue)
+
+            if current_duration > durations[current_vertex]:
+                continue
+
+            for e in range(offsets[current_vertex], offsets[current_vertex + 1]):
+                neighbor = neighbors[e]
+                duration = current_duration + weights2[e]
+
+                if duration < durations[neighbor]:
+                    durations[neighbor] = duration
+                    distances[neighbor] = distances[current_vertex] + weights1[e]
+                    previous[neighbor] = e
+                    heapq.heappush(priority_queue, (duration, neighbor))
+
+        return durations, distances, previous
+
+    def duration_tree(self, source: int, typecode: str):
+        """
+        One-to-all Dijkstra minimizing duration from the vertex with id source, like shortest_tree but in
+        compact form. Returns (durations, parents): the duration of each vertex's path in the integer width
+        of the edge durations (the largest value of that width for unreachable vertices), and the id of the
+        vertex it is reached from, in an array of the given typecode (-1 for the source and unreachable
+        vertices).
+        """
+        offsets, neighbors, weights = self.offsets, self.neighbors, self.durations
+        unreachable = max_value(weights.typecode)
+
+        durations = array(weights.typecode, [unreachable]) * len(self.labels)
+        parents = array(typecode, [-1]) * len(self.labels)
+        durations[source] = 0
+
+        priority_queue = [(0, source)]
+
+        while priority_queue:
+            current_duration, current_vertex = heapq.heappop(priority_queue)
+
+            if current_duration > durations[current_vertex]:
+                continue
+
+            for e in range(offsets[current_vertex], offsets[current_vertex + 1]):
+                neighbor = neighbors[e]
+                duration = current_duration + weights[e]
+
+                if duration < durations[neighbor]:
+                    durations[neighbor] = duration
+                    parents[neighbor] = current_vertex
+                    heapq.heappush(priority_queue, (duration, neighbor))
+
+        return durations, parents
+
+def max_value(typecode: str) -> int:
+    # The largest value of a signed integer array typecode
+    return (1 << (8 * array(typecode).itemsize - 1)) - 1
@@ -0,0 +1,90 @@
+from array import array
+
+from Flight import Flight
+from FlightTable import CATEGORICAL_COLUMNS, NUMERIC_COLUMNS
+
+DIRECTED = "directed"
+UNDIRECTED = "undirected"
+BOTH = "both"
+
+COLUMN_POSITIONS = {column: position for position, column in enumerate(CATEGORICAL_COLUMNS + NUMERIC_COLUMNS)}
+
+class Category():
+
+    def __init__(self, name: str, predicate=None, mode: str = BOTH, columns: dict = None):
+        if mode not in (DIRECTED, UNDIRECTED, BOTH):
+            raise ValueError(f"Modo de grafo no válido: {mode}")
+        if predicate is None and columns is None:
+            raise ValueError("La categoría necesita un predicado o condiciones sobre columnas.")
+        self.name = name
+        self.mode = mode
+        # Column conditions (column -> value) let the builders select rows on the encoded columns
+        self.columns = columns
+        if predicate is None:
+            predicate = lambda flight: all(_accepts(accepted, getattr(flight, column)) for column, accepted in columns.items())
+        self.predicate = predicate
+
+    def select(self, flights, selection=None) -> list:
+        if self.columns is not None:
+            return flights.select(self.columns, selection)
+        return flights.where(self.predicate, selection)
+
+    def matches(self, row: tuple) -> bool:
+        # row holds one flight's values in the flight table's column order, as streamed by Pipeline
+        if self.columns is None:
+            return self.predicate(Flight(*row))
+        return all(_accepts(accepted, row[COLUMN_POSITIONS[column]]) for column, accepted in self.columns.items())
+
+    def graph_names(self) -> list:
+        names = []
+        if self.mode in (DIRECTED, BOTH):
+            names.append((f"{self.name}_digraph", True))
+        if self.mode in (UNDIRECTED, BOTH):
+            names.append((f"{self.name}_graph", False))
+        return names
+
+def _accepts(accepted, value) -> bool:
+    # A condition is a single value or, as in FlightTable.select, a set of accepted values
+    if isinstance(accepted, (set, frozenset, list, tuple)):
+        return value in accepted
+    return value == accepted
+
+def category_masks(categories: list, bits: list, flights, rows) -> array:
+    """
+    Returns, for each of the flight table rows, the bitmask of the categories it belongs to (bits[i] standing
+    for categories[i]), in a single pass over the rows. Column conditions are answered on the encoded
+    columns through one code -> bitmask table per column; predicate categories are tested on the row's Flight.
+    """
+    # Every column-based category matches until one of its columns says otherwise
+    full = 0
+    for category, bit in zip(categories, bits):
+        if category.columns is not None:
+            full |= bit
+
+    tables = {}
+    for category, bit in zip(categories, bits):
+        for column, accepted in (category.columns or {}).items():
+            if column not in tables:
+                tables[column] = array('q', [full]) * len(flights.dictionaries[column])
+            table = tables[column]
+            values = accepted if isinstance(accepted, (set, frozenset, list, tuple)) else (accepted,)
+            codes = {flights.codes[column][value] for value in values if value in flights.codes[column]}
+            for code in range(len(table)):
+                if code not in codes:
+                    table[code] &= ~bit
+
+    lookups = [(flights.columns[column], table) for column, table in tables.items()]
+    predicates = [(category.predicate, bit) for category, bit in zip(categories, bits) if category.columns is None]
+
+    masks = array('q')
+    for row in rows:
+        mask = full
+        for data, table in lookups:
+            mask &= table[data[row]]
+        if predicates:
+            flight = flights[row]
+            for predicate, bit in predicates:
+                if predicate(flight):
+                    mask |= bit
+        masks.append(mask)
+    return masks
@@ -1,5 +1,23 @@
 from Logic import *;
+from Batch import run_batch
+from Dataset import load_dataset
+from Server import Server
 from tabulate import tabulate
+import argparse
+import asyncio
+import cProfile
+import itertools
+import json
+import pstats
+import sys
+
+AIRPORTS_FILE = "Data/airports-2022.csv"
+FLIGHTS_FILE = "Data/fligths-2022.csv"
+
+# Set by --flights-dir / --partitions to load a partitioned flight history instead of FLIGHTS_FILE
+FLIGHTS_DIR = None
+PARTITIONS = None
+PROCESSES = None
 
 airports = {}
 flights = []
@@ -17,53 +35,20 @@ def print_menu():
     print("8. Exit")
 
 
-def charge_data():
-    airports = read_airports("Data/airports-2022.csv")
-    flights = read_flights("Data/fligths-2022.csv")
+def load_console_data():
+    if FLIGHTS_DIR is None:
+        return load_data(AIRPORTS_FILE, FLIGHTS_FILE)
 
+    airports, flights, report = load_dataset(AIRPORTS_FILE, FLIGHTS_DIR, PARTITIONS, PROCESSES)
+    for key, count, rejects, cached in report:
+        print(f"Partition {key}: {count} flights, {len(rejects)} rejected lines{' (cached)' if cached else ''}")
+    return airports, flights
 
-    build_graphs()
+def charge_data():
+    airports, flights = load_console_data()
 
     # AUXILIAR
 
-    def get_top_5_airports(degreed_sorted: list, airports: dict, degreeMap: dict) -> list:
-
-        top_5_strings = []
-
-        for degree in degreed_sorted:
-            if len(top_5_strings) >= 5:
-                break
-            if isinstance(degreeMap[degree], list):
-                for airport in degreeMap[degree]:
-                    if len(top_5_strings) >= 5:
-                        break
-                    airport_info = airports[airport]
-                    top_5_strings.append((airport_info.name, airport_info.icao, airport_info.city, degree))
-            else:
-                airport_info = airports[airport]
-                top_5_strings.append((airport_info.name, airport_info.icao, airport_info.city, degree))
-
-        return top_5_strings
-    
-    def get_bottom_5_airports(degreed_sorted: list, airports: dict, degreeMap: dict) -> list:
-
-        bottom_5_strings = []
-
-        for degree in reversed(degreed_sorted):
-            if len(bottom_5_strings) >= 5:
-                break
-            if isinstance(degreeMap[degree], list):
-                for airport in degreeMap[degree]:
-                    if len(bottom_5_strings) >= 5:
-                        break
-                    airport_info = airports[airport]
-                    bottom_5_strings.append((airport_info.name, airport_info.icao, airport_info.city, degree))
-            else:
-                airport_info = airports[degreeMap[degree]]
-                bottom_5_strings.append((airport_info.name, airport_info.icao, airport_info.city, degree))
-
-        return bottom_5_strings
-
     def print_table_charge(data, headers):
         print(tabulate(data, headers=headers, tablefmt="grid"))
         print("\n" + "-"*40 + "\n")
@@ -75,11 +60,8 @@ def charge_data():
 
     #TOTAL
 
-    degree_general = get_airports_degree(general_digraph)
-    degree_general_sorted = sorted(degree_general.keys(), reverse=True)
-
-    top_5_general = get_top_5_airports(degree_general_sorted, airports, degree_general)
-    bottom_5_general = get_bottom_5_airports(degree_general_sorted, airports, degree_general)
+    top_5_general = get_top_airports(general_digraph, 5)
+    bottom_5_general = get_bottom_airports(general_digraph, 5)
 
     print("\n#################################################################")
     print("Top 5 most concurrent airports:")
@@ -92,11 +74,8 @@ def charge_data():
 
     #COMMERICAL
 
-    degree_commercial = get_airports_degree(commercial_digraph)
-    degree_commercial_sorted = sorted(degree_commercial.keys(), reverse=True)
-
-    top_5_commercial = get_top_5_airports(degree_commercial_sorted, airports, degree_commercial)
-    bottom_5_commercial = get_bottom_5_airports(degree_commercial_sorted, airports, degree_commercial)
+    top_5_commercial = get_top_airports(commercial_digraph, 5)
+    bottom_5_commercial = get_bottom_airports(commercial_digraph, 5)
 
     print("\n#################################################################")
     print("Top 5 most concurrent commercial airports:")
@@ -109,11 +88,8 @@ def charge_data():
 
     #MILITAR
 
-    degree_military = get_airports_degree(military_digraph)
-    degree_military_sorted = sorted(degree_military.keys(), reverse=True)
-
-    top_5_military = get_top_5_airports(degree_military_sorted, airports, degree_military)
-    bottom_5_military = get_bottom_5_airports(degree_military_sorted, airports, degree_military)
+    top_5_military = get_top_airports(military_digraph, 5)
+    bottom_5_military = get_bottom_airports(military_digraph, 5)
 
     print("\n#################################################################")
     print("Top 5 most concurrent military airports:")
@@ -126,11 +102,8 @@ def charge_data():
 
     #CARGO
 
-    degree_cargo = get_airports_degree(cargo_digraph)
-    degree_cargo_sorted = sorted(degree_cargo.keys(), reverse=True)
-
-    top_5_cargo = get_top_5_airports(degree_cargo_sorted, airports, degree_cargo)
-    bottom_5_cargo = get_bottom_5_airports(degree_cargo_sorted, airports, degree_cargo)
+    top_5_cargo = get_top_airports(cargo_digraph, 5)
+    bottom_5_cargo = get_bottom_airports(cargo_digraph, 5)
 
     print("\n#################################################################")
     print("Top 5 most concurrent cargo airports:")
@@ -143,24 +116,25 @@ def charge_data():
 
 
 def print_path(path):
-    print(tabulate(path, headers=["ICAO", "NAME", "CITY", "COUNTRY", "DISTANCE", "TIME", "TOTAL_DISTANCE", "TOTAL_TIME"], tablefmt="grid"))
+    with instrument.phase("console.format"):
+        print(tabulate(path, headers=["ICAO", "NAME", "CITY", "COUNTRY", "DISTANCE", "TIME", "TOTAL_DISTANCE", "TOTAL_TIME"], tablefmt="grid"))
 
 def print_tree(mst):
-   for i in range(len(mst)):
+   for i, branch in enumerate(mst):
         path_l = []
         path_distance = 0
         path_time = 0
-        for j in range(len(mst[i])):
+        for j in range(len(branch)):
                 path = []
-                if j == len(mst[i]) - 1:
+                if j == len(branch) - 1:
                         break
-                path.append(mst[i][j][0])
-                path.append(mst[i][j+1][0])
-                path.append(str(mst[i][j+1][1][0]))
-                path.append(str(mst[i][j+1][1][1]))
+                path.append(branch[j][0])
+                path.append(branch[j+1][0])
+                path.append(str(branch[j+1][1][0]))
+                path.append(str(branch[j+1][1][1]))
 
-                path_distance += int(mst[i][j+1][1][0])
-                path_time += int(mst[i][j+1][1][1])
+                path_distance += int(branch[j+1][1][0])
+                path_time += int(branch[j+1][1][1])
 
                 path.append(str(path_distance))
                 path.append(str(path_time))
@@ -171,11 +145,17 @@ def print_tree(mst):
         print(f"Path {i+1}:")
         print("###################################################################\n")
                 
-        print(tabulate(path_l, headers=["DEPARTURE_ICAO", "ARRIVAL_ICAO", "DISTANCE", "TIME", "TOTAL_DISTANCE", "TOTAL_TIME"], tablefmt="grid"))
+        with instrument.phase("console.format"):
+            print(tabulate(path_l, headers=["DEPARTURE_ICAO", "ARRIVAL_ICAO", "DISTANCE", "TIME", "TOTAL_DISTANCE", "TOTAL_TIME"], tablefmt="grid"))
 
-def print_dijkstra(path):
+def print_forest(graph_type):
+    components = [component for component in find_spanning_forest(graph_type) if component[1] > 1]
+    print(f'Connected components: {len(components)}')
+    print(tabulate(components, headers=["ROOT_ICAO", "AIRPORTS", "TOTAL_DISTANCE", "TOTAL_TIME", "TRAYECTS"], tablefmt="grid"))
 
-    print(tabulate(path, headers=["DEPARTURE_ICAO", "ARRIVAL_ICAO", "DISTANCE", "TIME", "TOTAL_DISTANCE", "TOTAL_TIME"], tablefmt="grid"))
+def print_dijkstra(path):
+    with instrument.phase("console.format"):
+        print(tabulate(path, headers=["DEPARTURE_ICAO", "ARRIVAL_ICAO", "DISTANCE", "TIME", "TOTAL_DISTANCE", "TOTAL_TIME"], tablefmt="grid"))
 
     
 
@@ -184,123 +164,186 @@ def main():
         print_menu()
         option = input("Select an option: ")
 
-        if option == "0":
-            charge_data()
-        elif option == "1":
-            lat1 = float(input("Enter the latitude of the origin: ").replace(",", "."))
-            lon1 = float(input("Enter the longitude of the origin: ").replace(",", "."))
-            lat2 = float(input("Enter the latitude of the destination: ").replace(",", "."))
-            lon2 = float(input("Enter the longitude of the destination: ").replace(",", "."))
+        if not handle_option(option):
+            break
+
+def handle_option(option):
+    if option == "0":
+        charge_data()
+    elif option == "1":
+        lat1 = float(input("Enter the latitude of the origin: ").replace(",", "."))
+        lon1 = float(input("Enter the longitude of the origin: ").replace(",", "."))
+        lat2 = float(input("Enter the latitude of the destination: ").replace(",", "."))
+        lon2 = float(input("Enter the longitude of the destination: ").replace(",", "."))
+
+        path, distance, time = find_path(lat1, lon1, lat2, lon2)
+        print("\n#################################################################")
+        if len(path) == 0:
+            print("No path was found.")
+        else:
+            print(f"Path from {path[0][1]} to {path[-1][1]}:")
+            print(f'Time: {time} minutes')
+            print(f'Distance: {distance} km')
+            print(f'Num of stops: {len(path) - 1}')
+        print("###################################################################\n")
+        print_path(path)
+    elif option == "2":
+        lat1 = float(input("Enter the latitude of the origin: ").replace(",", "."))
+        lon1 = float(input("Enter the longitude of the origin: ").replace(",", "."))
+        lat2 = float(input("Enter the latitude of the destination: ").replace(",", "."))
+        lon2 = float(input("Enter the longitude of the destination: ").replace(",", "."))
+
+        path, distance, time = find_path(lat1, lon1, lat2, lon2)
+        print("\n#################################################################")
+        if len(path) == 0:
+            print("No path was found.")
+        else:
+            print(f"Path from {path[0][1]} to {path[-1][1]}:")
+            print(f'Time: {time} minutes')
+            print(f'Distance: {distance} km')
+            print(f'Num of stops: {len(path) - 1}')
+        print("###################################################################\n")
+        print_path(path)
+    elif option == "3":
+        mst, airport, degree, total_distance, total_trayects, time = find_mst("commercial")
+        
+        if total_trayects == 0:
+            print("No path was found.")
+        else:
+            print_tree(mst)
 
-            path, distance, time = find_path(lat1, lon1, lat2, lon2)
             print("\n#################################################################")
-            if len(path) == 0:
-                print("No path was found.")
-            else:
-                print(f"Path from {path[0][1]} to {path[-1][1]}:")
-                print(f'Time: {time} minutes')
-                print(f'Distance: {distance} km')
-                print(f'Num of stops: {len(path) - 1}')
+            print(f'Most concurrent commercial airport: {airport.name} with {degree} flights')
+            print(f'Total distance: {total_distance} km')
+            print(f'Total trayects: {total_trayects}')
+            print(f'Total time: {time} minutes')
             print("###################################################################\n")
-            print_path(path)
-        elif option == "2":
-            lat1 = float(input("Enter the latitude of the origin: ").replace(",", "."))
-            lon1 = float(input("Enter the longitude of the origin: ").replace(",", "."))
-            lat2 = float(input("Enter the latitude of the destination: ").replace(",", "."))
-            lon2 = float(input("Enter the longitude of the destination: ").replace(",", "."))
-
-            path, distance, time = find_path(lat1, lon1, lat2, lon2)
+            print_forest("commercial")
+    elif option == "4":
+        mst, airport, degree, total_distance, total_trayects, time = find_mst("cargo")
+        
+        if total_trayects == 0:
+            print("No path was found.")
+        else:
+            print_tree(mst)
+
             print("\n#################################################################")
-            if len(path) == 0:
-                print("No path was found.")
-            else:
-                print(f"Path from {path[0][1]} to {path[-1][1]}:")
-                print(f'Time: {time} minutes')
-                print(f'Distance: {distance} km')
-                print(f'Num of stops: {len(path) - 1}')
+            print(f'Most concurrent cargo airport: {airport.name} with {degree} flights')
+            print(f'Total distance: {total_distance} km')
+            print(f'Total trayects: {total_trayects}')
+            print(f'Total time: {time} minutes')
             print("###################################################################\n")
-            print_path(path)
-        elif option == "3":
-            mst, airport, degree, total_distance, total_trayects, time = find_mst("commercial")
-            
-            if len(mst) == 0:
-                print("No path was found.")
-            else:
-                print_tree(mst)
-
-                print("\n#################################################################")
-                print(f'Most concurrent commercial airport: {airport.name} with {degree} flights')
-                print(f'Total distance: {total_distance} km')
-                print(f'Total trayects: {total_trayects}')
-                print(f'Total time: {time} minutes')
-                print("###################################################################\n")
-        elif option == "4":
-            mst, airport, degree, total_distance, total_trayects, time = find_mst("cargo")
-            
-            if len(mst) == 0:
-                print("No path was found.")
-            else:
-                print_tree(mst)
-
-                print("\n#################################################################")
-                print(f'Most concurrent cargo airport: {airport.name} with {degree} flights')
-                print(f'Total distance: {total_distance} km')
-                print(f'Total trayects: {total_trayects}')
-                print(f'Total time: {time} minutes')
-                print("###################################################################\n")
-        elif option == "5":
-            mst, airport, degree, total_distance, total_trayects, time = find_mst("military")
-            
-            if len(mst) == 0:
-                print("No path was found.")
-            else:
-                print_tree(mst)
-
-                print("\n#################################################################")
-                print(f'Most concurrent military airport: {airport.name} with {degree} flights')
-                print(f'Total distance: {total_distance} km')
-                print(f'Total trayects: {total_trayects}')
-                print(f'Total time: {time} minutes')
-                print("###################################################################\n")
-        elif option == "6":
-            top = int(input("Enter the top: "))
-            icao, degree, mst, distance, time = top_n_mst(top)
+            print_forest("cargo")
+    elif option == "5":
+        mst, airport, degree, total_distance, total_trayects, time = find_mst("military")
+        
+        if total_trayects == 0:
+            print("No path was found.")
+        else:
+            print_tree(mst)
 
             print("\n#################################################################")
-            if len(mst) == 0:
-                print("No path was found.")
-            else:
-                print(f'Most important airport: {icao} with {degree} flights')
-                print(f'Total distance: {distance} km')
-                print(f'Total time: {time} minutes')
+            print(f'Most concurrent military airport: {airport.name} with {degree} flights')
+            print(f'Total distance: {total_distance} km')
+            print(f'Total trayects: {total_trayects}')
+            print(f'Total time: {time} minutes')
             print("###################################################################\n")
+            print_forest("military")
+    elif option == "6":
+        top = int(input("Enter the top: "))
+        icao, degree, mst, distance, time = top_n_mst(top)
+        first_branch = next(mst, None)
+        mst = itertools.chain([first_branch], mst) if first_branch is not None else iter(())
 
-            print_tree(mst)
-        elif option == "7":
-            lat1 = float(input("Enter the latitude of the origin: ").replace(",", "."))
-            lon1 = float(input("Enter the longitude of the origin: ").replace(",", "."))
-            lat2 = float(input("Enter the latitude of the destination: ").replace(",", "."))
-            lon2 = float(input("Enter the longitude of the destination: ").replace(",", "."))
+        print("\n#################################################################")
+        if first_branch is None:
+            print("No path was found.")
+        else:
+            print(f'Most important airport: {icao} with {degree} flights')
+            print(f'Total distance: {distance} km')
+            print(f'Total time: {time} minutes')
+        print("###################################################################\n")
 
-            path, total_distance, total_time = shortest_path(lat1, lon1, lat2, lon2)
+        print_tree(mst)
+    elif option == "7":
+        lat1 = float(input("Enter the latitude of the origin: ").replace(",", "."))
+        lon1 = float(input("Enter the longitude of the origin: ").replace(",", "."))
+        lat2 = float(input("Enter the latitude of the destination: ").replace(",", "."))
+        lon2 = float(input("Enter the longitude of the destination: ").replace(",", "."))
 
-            print("\n#################################################################")
-            if len(path) == []:
-                print("No path was found.")
-            else:
-                print(f'Shortest path from {path[0][0]} to {path[-1][1]}:')
-                print(f'Total distance: {total_distance} km')
-                print(f'Total time: {total_time} minutes')
-                print(f'Num of stops: {len(path) - 1}')
-            print("###################################################################\n")
+        search_stats = {}
+        path, total_distance, total_time = shortest_path(lat1, lon1, lat2, lon2, stats=search_stats)
 
-            print_dijkstra(path)
-        elif option == "10":
-            break
+        print("\n#################################################################")
+        if len(path) == []:
+            print("No path was found.")
         else:
-            print("Opción no válida. Por favor, intente de nuevo.")
+            print(f'Shortest path from {path[0][0]} to {path[-1][1]}:')
+            print(f'Total distance: {total_distance} km')
+            print(f'Total time: {total_time} minutes')
+            print(f'Num of stops: {len(path) - 1}')
+            print(f'Expanded nodes: {search_stats.get("expanded", 0)} ({search_stats.get("algorithm", "-")})')
+        print("###################################################################\n")
+
+        print_dijkstra(path)
+    elif option == "10":
+        return False
+    else:
+        print("Opción no válida. Por favor, intente de nuevo.")
+
+    return True
 
+def profile_option(option, output_file=None):
+    instrument.enable(trace_memory=True)
+    if option != "0":
+        load_console_data()
+
+    profiler = cProfile.Profile()
+    with instrument.phase(f"option_{option}"):
+        profiler.enable()
+        handle_option(option)
+        profiler.disable()
+    instrument.disable()
+
+    print("\n#################################################################", file=sys.stderr)
+    print(f"Profile of option {option}:", file=sys.stderr)
+    print("###################################################################\n", file=sys.stderr)
+    pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(25)
+    print(json.dumps(get_profile(), indent=2), file=sys.stderr)
+    if output_file:
+        profiler.dump_stats(output_file)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Colombian aeronautics data analyzer")
+    parser.add_argument("--warm-cache", action="store_true", help="build the data snapshot if it is missing or stale, then exit")
+    parser.add_argument("--batch", metavar="QUERIES", help="run the queries of a JSON-lines or CSV file, then exit")
+    parser.add_argument("--output", default="-", help="where --batch writes its results (.jsonl or .csv, - for stdout)")
+    parser.add_argument("--processes", type=int, help="worker processes for --batch, --serve and --flights-dir (default: one per CPU)")
+    parser.add_argument("--serve", action="store_true", help="serve the queries over HTTP/JSON on 127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080, help="port for --serve")
+    parser.add_argument("--profile", metavar="OPTION", help="run one menu option (inputs from stdin) under cProfile and the instrumentation, then print both reports")
+    parser.add_argument("--profile-output", help="also save the raw cProfile data of --profile to this file")
+    parser.add_argument("--flights-dir", help="load the flight partition files (flights-YYYY.csv, flights-YYYY-MM.csv) under this directory instead of the 2022 file")
+    parser.add_argument("--partitions", nargs="*", metavar="KEY", help="with --flights-dir, only load these years or months (2023, 2023-05)")
+    args = parser.parse_args()
+    FLIGHTS_DIR, PARTITIONS, PROCESSES = args.flights_dir, args.partitions, args.processes
+
+    if args.batch:
+        summary = run_batch(args.batch, args.output, AIRPORTS_FILE, FLIGHTS_FILE, args.processes, FLIGHTS_DIR, PARTITIONS)
+        print(f"{summary['queries']} queries, {summary['errors']} errors in {summary['elapsed_s']} s", file=sys.stderr)
+    elif args.profile:
+        profile_option(args.profile, args.profile_output)
+    elif args.serve:
+        server = Server(AIRPORTS_FILE, FLIGHTS_FILE, args.port, args.processes, FLIGHTS_DIR, PARTITIONS)
+        try:
+            asyncio.run(server.serve_forever())
+        except KeyboardInterrupt:
+            pass
+    elif args.warm_cache:
+        if warm_cache(AIRPORTS_FILE, FLIGHTS_FILE):
+            print(f"Snapshot built: {SNAPSHOT_FILE}")
+        else:
+            print(f"Snapshot is up to date: {SNAPSHOT_FILE}")
+    else:
+        main()
\ No newline at end of file
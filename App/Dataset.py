@@ -0,0 +1,160 @@
+from concurrent.futures import ProcessPoolExecutor
+import os
+import re
+
+import Logic
+from FlightTable import FlightTable, CATEGORICAL_COLUMNS, NUMERIC_COLUMNS
+from Pipeline import Pipeline
+from Snapshot import file_hash, save_snapshot, load_snapshot
+
+# Parsed partitions, keyed by the hashes of the partition file and of the airport file
+PARTITION_CACHE_DIR = "Data/.cache/partitions"
+
+# flights-2023.csv (a year) or flights-2023-05.csv (a month); the 2022 file's "fligths" spelling is accepted
+PARTITION_PATTERN = re.compile(r"^(?:flights|fligths)-(\d{4})(?:-(\d{2}))?\.csv$")
+
+class Partition:
+    __slots__ = ("path", "year", "month")
+
+    def __init__(self, path: str, year: int, month: int = None):
+        self.path = path
+        self.year = year
+        self.month = month
+
+    @property
+    def key(self) -> str:
+        # "2023" for a yearly file, "2023-05" for a monthly one
+        return f"{self.year}" if self.month is None else f"{self.year}-{self.month:02d}"
+
+    def __repr__(self) -> str:
+        return f"Partition({self.key}, {self.path})"
+
+class Dataset:
+    """
+    A flight history split in partition files (one per year or per month) under a directory tree.
+
+    Selected partitions are parsed in parallel over a process pool, each into its own columnar table,
+    and merged in chronological order into Logic.flights. Every parsed partition is cached next to the
+    snapshot, keyed by its content hash and the airport file's, so adding a month only parses that month.
+    """
+
+    def __init__(self, directory: str, cache_dir: str = PARTITION_CACHE_DIR):
+        self.directory = directory
+        self.cache_dir = cache_dir
+        self.partitions = self.discover()
+
+    def discover(self) -> list:
+        """
+        Returns the partition files found under the directory, sorted by date (a year before its months).
+        """
+        partitions = []
+        for root, directories, files in os.walk(self.directory):
+            directories[:] = [directory for directory in directories if not directory.startswith(".")]
+            for file_name in files:
+                match = PARTITION_PATTERN.match(file_name)
+                if match:
+                    month = int(match.group(2)) if match.group(2) else None
+                    partitions.append(Partition(os.path.join(root, file_name), int(match.group(1)), month))
+        partitions.sort(key=lambda partition: (partition.year, partition.month or 0, partition.path))
+        return partitions
+
+    def select(self, keys: list = None) -> list:
+        """
+        Returns the partitions matching any of the keys, where a key is a year ("2023") or a month
+        ("2023-05"); a year key also selects that year's monthly files. No keys selects every partition.
+        """
+        if not keys:
+            return list(self.partitions)
+        keys = {str(key) for key in keys}
+        return [
+            partition for partition in self.partitions
+            if partition.key in keys or str(partition.year) in keys
+        ]
+
+    def load(self, partitions: list, airports_file: str, processes: int = None) -> list:
+        """
+        Appends the given partitions to Logic.flights, which must already hold the airports of
+        airports_file. Cached partitions are read from the cache; the rest are parsed, in a process pool
+        when there is more than one, and cached. Returns (key, flights, rejects, cached) per partition.
+        """
+        airports_hash = file_hash(airports_file)
+        keys = [{"airports": airports_hash, "flights": file_hash(partition.path)} for partition in partitions]
+
+        parsed = [self._read_cache(partition, key) for partition, key in zip(partitions, keys)]
+        missing = [i for i, result in enumerate(parsed) if result is None]
+
+        if processes is None:
+            processes = os.cpu_count() or 1
+        paths = [partitions[i].path for i in missing]
+        if processes <= 1 or len(paths) <= 1:
+            results = [_parse_partition(path) for path in paths]
+        else:
+            with ProcessPoolExecutor(min(processes, len(paths)), initializer=_init_worker, initargs=(airports_file,)) as executor:
+                results = list(executor.map(_parse_partition, paths))
+
+        for i, result in zip(missing, results):
+            self._write_cache(partitions[i], keys[i], result)
+            parsed[i] = result
+
+        report = []
+        for i, (partition, (dictionaries, columns, rejects)) in enumerate(zip(partitions, parsed)):
+            added = Logic.flights.merge(dictionaries, columns)
+            Logic.ingested_batches.add(keys[i]["flights"])
+            report.append((partition.key, len(added), rejects, i not in missing))
+        return report
+
+    def _cache_file(self, partition: Partition) -> str:
+        relative = os.path.relpath(partition.path, self.directory)
+        return os.path.join(self.cache_dir, relative.replace(os.sep, "_") + ".bin")
+
+    def _read_cache(self, partition: Partition, key: dict):
+        snapshot = load_snapshot(self._cache_file(partition), key)
+        if snapshot is None:
+            return None
+        metadata, sections = snapshot
+        columns = {column: sections[f"flights.{column}"] for column in CATEGORICAL_COLUMNS + NUMERIC_COLUMNS}
+        return metadata["dictionaries"], columns, [tuple(reject) for reject in metadata["rejects"]]
+
+    def _write_cache(self, partition: Partition, key: dict, result: tuple) -> None:
+        dictionaries, columns, rejects = result
+        sections = {f"flights.{column}": data for column, data in columns.items()}
+        save_snapshot(self._cache_file(partition), key, {"dictionaries": dictionaries, "rejects": rejects}, sections)
+
+def load_dataset(airports_file: str, directory: str, keys: list = None, processes: int = None, cache_dir: str = PARTITION_CACHE_DIR) -> tuple:
+    """
+    Replaces the loaded data with the airports of airports_file and the flights of the partitions of
+    directory selected by keys (years or months, see Dataset.select), then builds the graphs.
+    Returns the airports, the flight table and the per-partition report of Dataset.load. Logic.loaded_key
+    identifies the loaded partitions, so pool workers can tell whether they hold the same data.
+    """
+    dataset = Dataset(directory, cache_dir)
+    partitions = dataset.select(keys)
+    if not partitions:
+        raise ValueError(f"No hay particiones de vuelos en {directory} para {keys}.")
+
+    Logic._clear_data()
+    Logic.read_airports(airports_file)
+    with Logic.instrument.phase("load.partitions"):
+        report = dataset.load(partitions, airports_file, processes)
+    with Logic.instrument.phase("load.build_graphs"):
+        Logic.build_graphs()
+    Logic.loaded_key.update({"airports": file_hash(airports_file), "flights": [file_hash(partition.path) for partition in partitions]})
+    return Logic.airports, Logic.flights, report
+
+def _init_worker(airports_file: str) -> None:
+    # Forked workers inherit the parent's airports; spawned ones read them
+    if not Logic.airports:
+        Logic.read_airports(airports_file)
+
+def _parse_partition(path: str) -> tuple:
+    # Parses one partition file into its own table: (dictionaries, columns, rejects)
+    table = FlightTable()
+    pipeline = Pipeline(Logic.airports, Logic.get_route_distances, Logic.STREAM_CHUNK_SIZE)
+
+    def sink(rows):
+        for row in rows:
+            table.add_row(*row)
+
+    pipeline.add_sink(sink)
+    pipeline.run(path, overlap=False)
+    return table.dictionaries, table.columns, pipeline.rejects
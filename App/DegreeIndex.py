@@ -0,0 +1,45 @@
+import heapq
+
+class DegreeIndex:
+    """
+    Buckets vertices by degree so the highest and lowest ranked vertices can be read without
+    sorting every vertex. Within a degree, vertices keep the order in which they were added.
+    """
+
+    def __init__(self):
+        self.degrees = {}
+        self.buckets = {}
+        self.order = {}
+
+    def add(self, vertex: str) -> None:
+        if vertex not in self.degrees:
+            self.order[vertex] = len(self.order)
+            self.degrees[vertex] = 0
+            self.buckets.setdefault(0, {})[vertex] = None
+
+    def increment(self, vertex: str, amount: int = 1) -> None:
+        degree = self.degrees[vertex]
+        bucket = self.buckets[degree]
+        del bucket[vertex]
+        if not bucket:
+            del self.buckets[degree]
+
+        self.degrees[vertex] = degree + amount
+        self.buckets.setdefault(degree + amount, {})[vertex] = None
+
+    def top(self, k: int, key=None) -> list:
+        return self._rank(sorted(self.buckets, reverse=True), k, key)
+
+    def bottom(self, k: int, key=None) -> list:
+        return self._rank(sorted(self.buckets), k, key)
+
+    def _rank(self, degrees: list, k: int, key) -> list:
+        ranked = []
+        for degree in degrees:
+            if len(ranked) >= k:
+                break
+            bucket = self.buckets[degree]
+            candidates = bucket if key is None else [vertex for vertex in bucket if key(vertex)]
+            for vertex in heapq.nsmallest(k - len(ranked), candidates, key=self.order.__getitem__):
+                ranked.append((vertex, degree))
+        return ranked
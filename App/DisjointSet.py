@@ -0,0 +1,38 @@
+class DisjointSet:
+    """
+    Union-find over hashable elements, with path compression and union by rank.
+    """
+
+    def __init__(self, elements=()):
+        self.parent = {}
+        self.rank = {}
+        for element in elements:
+            self.add(element)
+
+    def add(self, element) -> None:
+        if element not in self.parent:
+            self.parent[element] = element
+            self.rank[element] = 0
+
+    def find(self, element):
+        root = element
+        while self.parent[root] != root:
+            root = self.parent[root]
+
+        while self.parent[element] != root:
+            self.parent[element], element = root, self.parent[element]
+
+        return root
+
+    def union(self, element1, element2) -> bool:
+        # Returns False when both elements were already in the same set
+        root1, root2 = self.find(element1), self.find(element2)
+        if root1 == root2:
+            return False
+
+        if self.rank[root1] < self.rank[root2]:
+            root1, root2 = root2, root1
+        self.parent[root2] = root1
+        if self.rank[root1] == self.rank[root2]:
+            self.rank[root1] += 1
+        return True
@@ -1,5 +1,7 @@
 class Flight():
 
+    __slots__ = ("origin", "origin_city", "destination", "destination_city", "plane_type", "traffic", "flight_type", "flight_duration", "flight_distance")
+
     def __init__(self, origin: str, origin_city: str, destination: str, destination_city: str, plane_type: str, traffic: str, flight_type: str, flight_duration: int, flight_distance: float):
         self.origin = origin
         self.origin_city = origin_city
@@ -0,0 +1,215 @@
+from array import array
+
+from Flight import Flight
+
+CATEGORICAL_COLUMNS = ("origin", "origin_city", "destination", "destination_city", "plane_type", "traffic", "flight_type")
+NUMERIC_COLUMNS = ("flight_duration", "flight_distance")
+
+class FlightTable:
+    """
+    Columnar store of flights.
+
+    Categorical columns are dictionary-encoded: columns[name] holds an integer code per row and
+    dictionaries[name][code] the value it stands for. flight_duration and flight_distance are plain
+    numeric arrays. Indexing or iterating the table yields Flight rows built on demand.
+    """
+
+    def __init__(self):
+        self.dictionaries = {column: [] for column in CATEGORICAL_COLUMNS}
+        self.codes = {column: {} for column in CATEGORICAL_COLUMNS}
+        self.columns = {column: array('i') for column in CATEGORICAL_COLUMNS}
+        self.columns["flight_duration"] = array('q')
+        self.columns["flight_distance"] = array('d')
+        # Row indices by value of a categorical column, built on first use and extended as rows are added
+        self.indexes = {}
+        # Whether the columns are read-only views (e.g. of a mapped snapshot), copied before the first write
+        self.mapped = False
+
+    def clear(self) -> None:
+        self.__init__()
+
+    def restore(self, dictionaries: dict, columns: dict) -> None:
+        """
+        Replaces the table's content with already encoded columns (e.g. read from a snapshot). The columns
+        are used as given, so memoryviews of a mapped snapshot are read in place until rows are added.
+        """
+        self.dictionaries = {column: list(dictionaries[column]) for column in CATEGORICAL_COLUMNS}
+        self.codes = {column: {value: code for code, value in enumerate(values)} for column, values in self.dictionaries.items()}
+        self.columns = {column: columns[column] for column in CATEGORICAL_COLUMNS + NUMERIC_COLUMNS}
+        self.indexes = {}
+        self.mapped = any(not isinstance(data, array) for data in self.columns.values())
+
+    def _writable(self) -> None:
+        # Copies read-only columns into arrays of the same type
+        for column, data in self.columns.items():
+            if not isinstance(data, array):
+                copy = array(data.format)
+                copy.frombytes(data.cast("B"))
+                self.columns[column] = copy
+        self.mapped = False
+
+    def __len__(self) -> int:
+        return len(self.columns["flight_duration"])
+
+    def __getitem__(self, row: int) -> Flight:
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("Índice de vuelo fuera de rango.")
+        return Flight(*(self.value(column, row) for column in CATEGORICAL_COLUMNS + NUMERIC_COLUMNS))
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self[row]
+
+    def encode(self, column: str, value: str) -> int:
+        codes = self.codes[column]
+        if value not in codes:
+            codes[value] = len(codes)
+            self.dictionaries[column].append(value)
+        return codes[value]
+
+    def value(self, column: str, row: int):
+        if column in NUMERIC_COLUMNS:
+            return self.columns[column][row]
+        return self.dictionaries[column][self.columns[column][row]]
+
+    def append(self, flight: Flight) -> None:
+        self.add_row(*(getattr(flight, column) for column in CATEGORICAL_COLUMNS + NUMERIC_COLUMNS))
+
+    def add_row(self, origin: str, origin_city: str, destination: str, destination_city: str, plane_type: str, traffic: str, flight_type: str, flight_duration: int, flight_distance: float) -> None:
+        if self.mapped:
+            self._writable()
+        values = (origin, origin_city, destination, destination_city, plane_type, traffic, flight_type)
+        for column, value in zip(CATEGORICAL_COLUMNS, values):
+            self.columns[column].append(self.encode(column, value))
+        self.columns["flight_duration"].append(flight_duration)
+        self.columns["flight_distance"].append(flight_distance)
+
+    def extend(self, flights) -> None:
+        for flight in flights:
+            self.append(flight)
+
+    def merge(self, dictionaries: dict, columns: dict) -> range:
+        """
+        Appends the rows of another table given as its dictionaries and columns (as restore takes them),
+        re-encoding its categorical codes into this table's dictionaries. Returns the indices of the new rows.
+        """
+        if self.mapped:
+            self._writable()
+        first = len(self)
+        for column in CATEGORICAL_COLUMNS:
+            codes = [self.encode(column, value) for value in dictionaries[column]]
+            self.columns[column].extend(codes[code] for code in columns[column])
+        for column in NUMERIC_COLUMNS:
+            self.columns[column].extend(columns[column])
+        return range(first, len(self))
+
+    def rows(self, selection=None):
+        """
+        Yields the Flight rows of a selection (all rows by default).
+        """
+        for row in range(len(self)) if selection is None else selection:
+            yield self[row]
+
+    def select(self, conditions: dict, selection=None) -> array:
+        """
+        Returns the indices of the rows whose columns match every condition. A condition's value may
+        be a single value or a set of accepted values; an empty conditions dict selects every row.
+        Without a previous selection, the first condition is read from that column's index.
+        """
+        selected = None if selection is None else array('q', selection)
+        for column, accepted in conditions.items():
+            if isinstance(accepted, (set, frozenset, list, tuple)):
+                values = accepted
+            else:
+                values = (accepted,)
+            if selected is None:
+                # The first condition over the whole table is answered by the column's index
+                selected = self.rows_with(column, values)
+                continue
+            codes = {self.codes[column][value] for value in values if value in self.codes[column]}
+            data = self.columns[column]
+            selected = array('q', (row for row in selected if data[row] in codes))
+        return array('q', range(len(self))) if selected is None else selected
+
+    def index(self, column: str) -> dict:
+        """
+        Returns the index of a categorical column: the ascending row indices of every code. The index is
+        built on first use and only the rows appended since the previous call are added to it.
+        """
+        if column not in self.indexes:
+            self.indexes[column] = (0, {})
+        indexed, rows_by_code = self.indexes[column]
+
+        data = self.columns[column]
+        for row in range(indexed, len(self)):
+            code = data[row]
+            if code not in rows_by_code:
+                rows_by_code[code] = array('q')
+            rows_by_code[code].append(row)
+
+        self.indexes[column] = (len(self), rows_by_code)
+        return rows_by_code
+
+    def rows_with(self, column: str, values) -> array:
+        """
+        Returns, in ascending order, the indices of the rows whose column holds any of the values, read
+        from the column's index in time proportional to the number of matching rows.
+        """
+        rows_by_code = self.index(column)
+        codes = [self.codes[column][value] for value in values if value in self.codes[column]]
+        if len(codes) == 1:
+            return array('q', rows_by_code.get(codes[0], ()))
+        return array('q', sorted(row for code in codes for row in rows_by_code.get(code, ())))
+
+    def where(self, predicate, selection=None) -> array:
+        """
+        Returns the indices of the rows whose Flight satisfies the predicate.
+        """
+        rows = range(len(self)) if selection is None else selection
+        return array('q', (row for row in rows if predicate(self[row])))
+
+    def group_by(self, column: str, selection=None) -> dict:
+        """
+        Groups row indices by the value of a categorical column, in order of first appearance.
+        """
+        data = self.columns[column]
+        groups = {}
+        for row in range(len(self)) if selection is None else selection:
+            code = data[row]
+            if code not in groups:
+                groups[code] = array('q')
+            groups[code].append(row)
+        return {self.dictionaries[column][code]: rows for code, rows in groups.items()}
+
+    def count_by(self, column: str, selection=None) -> dict:
+        """
+        Counts the rows for each value of a categorical column, in order of first appearance.
+        """
+        data = self.columns[column]
+        counts = {}
+        for row in range(len(self)) if selection is None else selection:
+            counts[data[row]] = counts.get(data[row], 0) + 1
+        return {self.dictionaries[column][code]: count for code, count in counts.items()}
+
+    def records(self, columns: tuple, selection=None):
+        """
+        Yields a tuple with the given columns' values for every selected row.
+        """
+        rows = range(len(self)) if selection is None else selection
+        return zip(*(self._decoded(column, rows) for column in columns))
+
+    def edges(self, selection=None):
+        """
+        Yields (origin, destination, flight_distance, flight_duration) for the selected rows, the edge
+        stream consumed by the graph builders.
+        """
+        return self.records(("origin", "destination", "flight_distance", "flight_duration"), selection)
+
+    def _decoded(self, column: str, rows):
+        # The column's values (decoded for categorical columns) of the given rows, as a lazy iterator
+        values = map(self.columns[column].__getitem__, rows)
+        if column in NUMERIC_COLUMNS:
+            return values
+        return map(self.dictionaries[column].__getitem__, values)
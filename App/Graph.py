@@ -1,14 +1,40 @@
 from collections import deque
+from math import log2
 import heapq
 
+from DegreeIndex import DegreeIndex
+from DisjointSet import DisjointSet
+from IndexedHeap import IndexedHeap
+from Reachability import Reachability
+
 class Graph:
     def __init__(self, directed=True):
         self.vertices = {}
+        # Undirected graphs are symmetric, so their reverse adjacency is the adjacency itself
+        self.reverse = {} if directed else self.vertices
+        self.indegrees = {}
+        self.outdegrees = {}
+        self.degree_index = DegreeIndex()
         self.directed = directed
+        # Bumped on every change, so cached results can tell whether they are stale
+        self.version = 0
+        self._sorted_edges = None
+        self._reachability = None
     
     def add_vertex(self, vertex: str) -> None:
         if vertex not in self.vertices:
             self.vertices[vertex] = {}
+            if self.directed:
+                self.reverse[vertex] = {}
+            self.indegrees[vertex] = 0
+            self.outdegrees[vertex] = 0
+            self.degree_index.add(vertex)
+            self.version += 1
+
+    def clear(self) -> None:
+        version = self.version
+        self.__init__(self.directed)
+        self.version = version + 1
 
     def has_vertex(self, vertex: str) -> bool:
         return vertex in self.vertices
@@ -19,18 +45,41 @@ class Graph:
         if vertex2 not in self.vertices:
             self.add_vertex(vertex2)
 
-        if vertex2 in self.vertices[vertex1]:
-            if self.vertices[vertex1][vertex2][0] > weight1:
-                self.vertices[vertex1][vertex2] = (weight1, weight2)
-        else:
-            self.vertices[vertex1][vertex2] = (weight1, weight2)
-
+        self._link(vertex1, vertex2, weight1, weight2)
         if not self.directed:
-            if vertex1 in self.vertices[vertex2]:
-                if self.vertices[vertex2][vertex1][0] > weight1:
-                    self.vertices[vertex2][vertex1] = (weight1, weight2)
-            else:
-                self.vertices[vertex2][vertex1] = (weight1, weight2)
+            self._link(vertex2, vertex1, weight1, weight2)
+
+    def _link(self, vertex1: str, vertex2: str, weight1: int, weight2: int) -> None:
+        neighbors = self.vertices[vertex1]
+
+        if vertex2 in neighbors:
+            if neighbors[vertex2][0] > weight1:
+                neighbors[vertex2] = (weight1, weight2)
+                if self.directed:
+                    self.reverse[vertex2][vertex1] = neighbors[vertex2]
+                self.version += 1
+        else:
+            neighbors[vertex2] = (weight1, weight2)
+            if self.directed:
+                self.reverse[vertex2][vertex1] = neighbors[vertex2]
+            self.outdegrees[vertex1] += 1
+            self.indegrees[vertex2] += 1
+            self.degree_index.increment(vertex1)
+            self.degree_index.increment(vertex2)
+            self.version += 1
+
+    def subgraph(self, vertices) -> "Graph":
+        # Induced subgraph on the given vertices (in their order), touching only the edges that leave them
+        sub = Graph(directed=self.directed)
+        for vertex in vertices:
+            if vertex in self.vertices:
+                sub.add_vertex(vertex)
+
+        for vertex1 in sub.vertices:
+            for vertex2, (weight1, weight2) in self.vertices[vertex1].items():
+                if vertex2 in sub.vertices:
+                    sub._link(vertex1, vertex2, weight1, weight2)
+        return sub
 
     def get_vertices(self) -> list:
         return list(self.vertices.keys())
@@ -44,52 +93,137 @@ class Graph:
         else:
             return None
         
+    def get_predecessors(self, vertex: str) -> dict:
+        return self.reverse[vertex]
+
     def get_indegree(self, vertex: str) -> int:
-        indegree = 0
-        for v in self.vertices:
-            if vertex in self.vertices[v]:
-                indegree += 1
-        return indegree
+        return self.indegrees.get(vertex, 0)
 
     def get_outdegree(self, vertex: str) -> int:
-        if vertex in self.vertices:
-            return len(self.vertices[vertex])
-        else:
-            return 0
+        return self.outdegrees.get(vertex, 0)
         
     def get_degree(self, vertex: str) -> int:
         return self.get_indegree(vertex) + self.get_outdegree(vertex)
+
+    def top_by_degree(self, k: int, key=None) -> list:
+        return self.degree_index.top(k, key)
+
+    def bottom_by_degree(self, k: int, key=None) -> list:
+        return self.degree_index.bottom(k, key)
     
     #===========================================================================
     # ALGORITHMS
     #===========================================================================
     
-    def bfs_path(self, start: str, goal: str) -> list:
+    def bfs_path(self, start: str, goal: str, bidirectional: bool = False) -> list:
         if start not in self.vertices or goal not in self.vertices:
             return []
 
-        queue = deque([(start, [(start, (0, 0))])])
-        visited = set()
+        if start == goal:
+            # Only a self-loop leads back to the start
+            if goal in self.get_neighbors(start):
+                return [(start, (0, 0)), (goal, self.get_neighbors(start)[goal])]
+            return []
 
-        while queue:
-            vertex, path = queue.popleft()
-            if vertex in visited:
-                continue
+        if bidirectional:
+            return self._bidirectional_bfs_path(start, goal)
 
-            for next_vertex, (weight1, weight2) in self.get_neighbors(vertex).items():
-                if next_vertex in visited:
+        # Vertices are marked when first reached, and each remembers the vertex and edge it was reached from
+        parents = {start: None}
+        queue = deque([start])
+
+        while queue:
+            vertex = queue.popleft()
+            for next_vertex, weights in self.get_neighbors(vertex).items():
+                if next_vertex in parents:
                     continue
+                parents[next_vertex] = (vertex, weights)
                 if next_vertex == goal:
-                    return path + [(next_vertex, (weight1, weight2))]
-                else:
-                    queue.append((next_vertex, path + [(next_vertex, (weight1, weight2))]))
+                    return self.tree_path(parents, goal)
+                queue.append(next_vertex)
+
+        return []
 
-            visited.add(vertex)
+    def _bidirectional_bfs_path(self, start: str, goal: str) -> list:
+        # Forward parents map a vertex to (previous vertex, weights); backward ones to (next vertex, weights)
+        parents = ({start: None}, {goal: None})
+        depths = ({start: 0}, {goal: 0})
+        frontiers = ([start], [goal])
+        adjacency = (self.get_neighbors, self.get_predecessors)
+
+        while frontiers[0] and frontiers[1]:
+            # Expand a whole layer of the smaller frontier, then join through the best meeting vertex in it
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            other_depths = depths[1 - side]
+            next_frontier = []
+            meeting = None
+
+            for vertex in frontiers[side]:
+                for next_vertex, weights in adjacency[side](vertex).items():
+                    if next_vertex in parents[side]:
+                        continue
+                    parents[side][next_vertex] = (vertex, weights)
+                    depths[side][next_vertex] = depths[side][vertex] + 1
+                    next_frontier.append(next_vertex)
+                    if next_vertex in other_depths and (meeting is None or other_depths[next_vertex] < other_depths[meeting]):
+                        meeting = next_vertex
+
+            if meeting is not None:
+                path = self.tree_path(parents[0], meeting)
+                current = meeting
+                while parents[1][current] is not None:
+                    next_vertex, weights = parents[1][current]
+                    path.append((next_vertex, weights))
+                    current = next_vertex
+                return path
+
+            frontiers = (next_frontier, frontiers[1]) if side == 0 else (frontiers[0], next_frontier)
 
         return []
 
+    def bfs_tree(self, start: str) -> dict:
+        # Fewest-stops routes from start to every reachable vertex, as parent pointers for tree_path
+        if start not in self.vertices:
+            return {}
+
+        parents = {start: None}
+        queue = deque([start])
+
+        while queue:
+            vertex = queue.popleft()
+            for next_vertex, weights in self.get_neighbors(vertex).items():
+                if next_vertex not in parents:
+                    parents[next_vertex] = (vertex, weights)
+                    queue.append(next_vertex)
+
+        return parents
+
+    @staticmethod
+    def tree_path(parents: dict, goal: str) -> list:
+        if goal not in parents:
+            return []
+
+        path = []
+        current = goal
+        while parents[current] is not None:
+            previous, weights = parents[current]
+            path.append((current, weights))
+            current = previous
+        path.append((current, (0, 0)))
+        path.reverse()
+        return path
+
+    def reachability(self) -> Reachability:
+        # Component index of the graph, rebuilt only after the graph changes
+        if self._reachability is None or self._reachability.version != self.version:
+            self._reachability = Reachability(self)
+        return self._reachability
+
     def has_path(self, start: str, goal: str) -> bool:
-        return bool(self.bfs_path(start, goal))
+        if start == goal:
+            # A vertex only reaches itself through a self-loop, as in bfs_path
+            return bool(self.bfs_path(start, goal))
+        return self.reachability().reachable(start, goal)
 
     def prim(self, start_vertex: str):
         if start_vertex not in self.vertices:
@@ -126,74 +260,328 @@ class Graph:
 
         return mst, total_cost_weight1, total_cost_weight2
 
-    def find_branches(self, start_vertex):
-        def dfs(vertex, path, visited):
-            if path:
-                last_vertex, last_weights = path[-1]
-                path.append((vertex, self.get_weight(last_vertex, vertex)))
-            else:
-                path.append((vertex, (0, 0)))
-            visited.add(vertex)
+    def prim_eager(self, start_vertex: str):
+        # Same tree as prim, but each outside vertex keeps only its best crossing edge in an indexed heap
+        if start_vertex not in self.vertices:
+            raise ValueError("El vértice inicial no está en el grafo.")
 
-            neighbors = self.get_neighbors(vertex)
-            if len(neighbors) == 0 or all(neighbor in visited for neighbor in neighbors):
-                branches.append(list(path))
-            else:
-                for neighbor in neighbors:
-                    if neighbor not in visited:
-                        dfs(neighbor, path, visited)
+        mst = Graph(directed=self.directed)
+        mst.add_vertex(start_vertex)
 
-            path.pop()
-            visited.remove(vertex)
+        visited = {start_vertex}
+        # A vertex's priority is its best crossing edge (weight1, weight2, tree vertex, vertex), as prim orders them
+        heap = IndexedHeap()
+        for neighbor, (weight1, weight2) in self.get_neighbors(start_vertex).items():
+            if neighbor not in visited:
+                heap.push_or_decrease(neighbor, (weight1, weight2, start_vertex, neighbor))
 
-        branches = []
-        if start_vertex in self.vertices:
-            dfs(start_vertex, [], set())
-        return branches
-    
-    def dijkstra(self, start: str, end: str):
-            if start not in self.vertices or end not in self.vertices:
-                raise ValueError("Los vértices inicial y/o final no están en el grafo.")
+        total_cost_weight1 = 0
+        total_cost_weight2 = 0
 
-            distances = {vertex: float('inf') for vertex in self.vertices}
-            distances[start] = 0
-            previous = {vertex: None for vertex in self.vertices}
+        while heap:
+            vertex2, (weight1, weight2, vertex1, _) = heap.pop()
+            visited.add(vertex2)
+            mst.add_vertex(vertex2)
+            mst.add_edge(vertex1, vertex2, weight1, weight2)
+            total_cost_weight1 += weight1
+            total_cost_weight2 += weight2
 
-            priority_queue = [(0, start)]
-            heapq.heapify(priority_queue)
+            for next_neighbor, (next_weight1, next_weight2) in self.get_neighbors(vertex2).items():
+                if next_neighbor not in visited:
+                    heap.push_or_decrease(next_neighbor, (next_weight1, next_weight2, vertex2, next_neighbor))
 
-            while priority_queue:
-                current_distance, current_vertex = heapq.heappop(priority_queue)
+        return mst, total_cost_weight1, total_cost_weight2
 
-                if current_vertex == end:
+    def sorted_edges(self) -> list:
+        # Undirected edges as (weight1, weight2, vertex1, vertex2) sorted by weight, cached until the graph changes
+        if self._sorted_edges is None or self._sorted_edges[0] != self.version:
+            edges = sorted(
+                (weight1, weight2, vertex1, vertex2)
+                for vertex1, neighbors in self.vertices.items()
+                for vertex2, (weight1, weight2) in neighbors.items()
+                if vertex1 < vertex2
+            )
+            self._sorted_edges = (self.version, edges)
+        return self._sorted_edges[1]
+
+    def kruskal(self) -> list:
+        # Minimum spanning forest: one (root, tree, total weight1, total weight2) per connected component,
+        # rooted at the component's first vertex in insertion order
+        if self.directed:
+            raise ValueError("Kruskal requiere un grafo no dirigido.")
+
+        components = DisjointSet(self.vertices)
+        chosen = []
+        for weight1, weight2, vertex1, vertex2 in self.sorted_edges():
+            if components.union(vertex1, vertex2):
+                chosen.append((weight1, weight2, vertex1, vertex2))
+                if len(chosen) == len(self.vertices) - 1:
                     break
 
-                if current_distance > distances[current_vertex]:
-                    continue
+        forest = {}
+        for vertex in self.vertices:
+            representative = components.find(vertex)
+            if representative not in forest:
+                forest[representative] = [vertex, Graph(directed=False), 0, 0]
+            forest[representative][1].add_vertex(vertex)
+
+        for weight1, weight2, vertex1, vertex2 in chosen:
+            tree = forest[components.find(vertex1)]
+            tree[1].add_edge(vertex1, vertex2, weight1, weight2)
+            tree[2] += weight1
+            tree[3] += weight2
+
+        return [tuple(tree) for tree in forest.values()]
+
+    def spanning_forest(self, algorithm: str = "auto") -> list:
+        # Minimum spanning tree of every connected component, as (root, tree, total weight1, total weight2)
+        if self.directed:
+            raise ValueError("El bosque de expansión requiere un grafo no dirigido.")
+        if algorithm == "auto":
+            algorithm = self.mst_algorithm()
+
+        if algorithm == "kruskal":
+            return self.kruskal()
+
+        forest = []
+        covered = set()
+        for vertex in self.vertices:
+            if vertex not in covered:
+                tree, total_weight1, total_weight2 = self.prim_eager(vertex) if algorithm == "prim" else self.prim(vertex)
+                covered.update(tree.vertices)
+                forest.append((vertex, tree, total_weight1, total_weight2))
+        return forest
+
+    def minimum_spanning_tree(self, start_vertex: str, algorithm: str = "auto"):
+        # Spanning tree of start_vertex's component, like prim. "auto" picks the algorithm by density; the
+        # tree from Kruskal is re-rooted with prim over its own edges, so every algorithm yields the same tree
+        if start_vertex not in self.vertices:
+            raise ValueError("El vértice inicial no está en el grafo.")
+        if algorithm == "auto":
+            algorithm = self.mst_algorithm()
+
+        if algorithm == "prim":
+            return self.prim_eager(start_vertex)
+        if algorithm == "lazy_prim":
+            return self.prim(start_vertex)
+        if algorithm == "kruskal":
+            for root, tree, total_weight1, total_weight2 in self.kruskal():
+                if tree.has_vertex(start_vertex):
+                    return tree.prim(start_vertex)
+        raise ValueError(f"Algoritmo no válido: {algorithm}")
+
+    def mst_algorithm(self) -> str:
+        # Kruskal's sort pays off on sparse graphs; eager Prim on dense ones (and it is the only one for digraphs)
+        if self.directed:
+            return "prim"
+        vertices = len(self.vertices)
+        edges = sum(self.outdegrees.values()) // 2
+        return "kruskal" if edges <= vertices * log2(max(vertices, 2)) else "prim"
 
-                for neighbor, (weight1, weight2) in self.get_neighbors(current_vertex).items():
-                    distance = current_distance + weight2
-
-                    if distance < distances[neighbor]:
-                        distances[neighbor] = distance
-                        previous[neighbor] = (current_vertex, weight1, weight2)
-                        heapq.heappush(priority_queue, (distance, neighbor))
-
-            # Reconstruir el camino y calcular los costos
-            path = []
-            path_weights = []
-            current = end
-            while current is not None:
-                if previous[current] is not None:
-                    prev_vertex, weight1, weight2 = previous[current]
-                    path.insert(0, current)
-                    path_weights.insert(0, (weight1, weight2))
-                    current = prev_vertex
+    def find_branches(self, start_vertex):
+        return [[(vertex, weights) for vertex, weights, totals in branch] for branch in self.iter_branches(start_vertex)]
+
+    def iter_branches(self, start_vertex):
+        # Yields every branch (a path from start_vertex that cannot be extended without repeating a vertex)
+        # one at a time. Each step is (vertex, (weight1, weight2), (cumulative weight1, cumulative weight2)).
+        for path in self._walk_branches(start_vertex):
+            yield list(path)
+
+    def count_branches(self, start_vertex) -> int:
+        return sum(1 for path in self._walk_branches(start_vertex))
+
+    def _walk_branches(self, start_vertex):
+        # Iterative depth-first walk; yields the shared path list at every leaf, so callers must copy it
+        if start_vertex not in self.vertices:
+            return
+
+        path = [(start_vertex, (0, 0), (0, 0))]
+        on_path = {start_vertex}
+        neighbors = self.get_neighbors(start_vertex)
+        if all(neighbor in on_path for neighbor in neighbors):
+            yield path
+            return
+
+        stack = [iter(neighbors.items())]
+        while stack:
+            for neighbor, weights in stack[-1]:
+                if neighbor in on_path:
+                    continue
+                totals = path[-1][2]
+                path.append((neighbor, weights, (totals[0] + weights[0], totals[1] + weights[1])))
+                on_path.add(neighbor)
+
+                next_neighbors = self.get_neighbors(neighbor)
+                if all(next_neighbor in on_path for next_neighbor in next_neighbors):
+                    yield path
+                    path.pop()
+                    on_path.remove(neighbor)
                 else:
-                    path.insert(0, current)
-                    current = None
+                    stack.append(iter(next_neighbors.items()))
+                    break
+            else:
+                stack.pop()
+                on_path.remove(path.pop()[0])
+    
+    def dijkstra(self, start: str, end: str, weight: int = 1, stats: dict = None):
+        if start not in self.vertices or end not in self.vertices:
+            raise ValueError("Los vértices inicial y/o final no están en el grafo.")
 
-            total_weight1 = sum(weight1 for weight1, weight2 in path_weights)
-            total_weight2 = sum(weight2 for weight1, weight2 in path_weights)
-            
-            return path, path_weights, total_weight1, total_weight2
+        distances = {start: 0}
+        previous = {}
+        expanded = 0
+        pushes = 1
+        relaxed = 0
+
+        priority_queue = [(0, start)]
+
+        while priority_queue:
+            current_distance, current_vertex = heapq.heappop(priority_queue)
+
+            if current_vertex == end:
+                break
+
+            if current_distance > distances[current_vertex]:
+                continue
+            expanded += 1
+
+            neighbors = self.get_neighbors(current_vertex)
+            relaxed += len(neighbors)
+            for neighbor, weights in neighbors.items():
+                distance = current_distance + weights[weight]
+
+                if distance < distances.get(neighbor, float('inf')):
+                    distances[neighbor] = distance
+                    previous[neighbor] = (current_vertex, weights[0], weights[1])
+                    heapq.heappush(priority_queue, (distance, neighbor))
+                    pushes += 1
+
+        if stats is not None:
+            stats["algorithm"] = "dijkstra"
+            stats["expanded"] = expanded
+            stats["pushes"] = pushes
+            stats["relaxed"] = relaxed
+
+        return self._path_from_previous(previous, end)
+
+    def astar(self, start: str, end: str, heuristic, weight: int = 0, stats: dict = None):
+        # heuristic(vertex) must never overestimate the remaining cost to end (admissible and consistent)
+        if start not in self.vertices or end not in self.vertices:
+            raise ValueError("Los vértices inicial y/o final no están en el grafo.")
+
+        distances = {start: 0}
+        previous = {}
+        expanded = 0
+        pushes = 1
+        relaxed = 0
+
+        priority_queue = [(heuristic(start), 0, start)]
+
+        while priority_queue:
+            estimate, current_distance, current_vertex = heapq.heappop(priority_queue)
+
+            if current_vertex == end:
+                break
+
+            if current_distance > distances[current_vertex]:
+                continue
+            expanded += 1
+
+            neighbors = self.get_neighbors(current_vertex)
+            relaxed += len(neighbors)
+            for neighbor, weights in neighbors.items():
+                distance = current_distance + weights[weight]
+
+                if distance < distances.get(neighbor, float('inf')):
+                    distances[neighbor] = distance
+                    previous[neighbor] = (current_vertex, weights[0], weights[1])
+                    heapq.heappush(priority_queue, (distance + heuristic(neighbor), distance, neighbor))
+                    pushes += 1
+
+        if stats is not None:
+            stats["algorithm"] = "astar"
+            stats["expanded"] = expanded
+            stats["pushes"] = pushes
+            stats["relaxed"] = relaxed
+
+        return self._path_from_previous(previous, end)
+
+    def bidirectional_dijkstra(self, start: str, end: str, weight: int = 1, stats: dict = None):
+        if start not in self.vertices or end not in self.vertices:
+            raise ValueError("Los vértices inicial y/o final no están en el grafo.")
+
+        # Side 0 searches forward from start, side 1 backward from end over the reverse adjacency
+        adjacency = (self.get_neighbors, self.get_predecessors)
+        distances = ({start: 0}, {end: 0})
+        previous = ({}, {})
+        queues = ([(0, start)], [(0, end)])
+        best, meeting = (0, start) if start == end else (float('inf'), None)
+        expanded = 0
+        pushes = 2
+        relaxed = 0
+
+        while queues[0] and queues[1]:
+            if queues[0][0][0] + queues[1][0][0] >= best:
+                break
+
+            side = 0 if queues[0][0][0] <= queues[1][0][0] else 1
+            current_distance, current_vertex = heapq.heappop(queues[side])
+            if current_distance > distances[side][current_vertex]:
+                continue
+            expanded += 1
+
+            other = distances[1 - side]
+            neighbors = adjacency[side](current_vertex)
+            relaxed += len(neighbors)
+            for neighbor, weights in neighbors.items():
+                distance = current_distance + weights[weight]
+
+                if distance < distances[side].get(neighbor, float('inf')):
+                    distances[side][neighbor] = distance
+                    previous[side][neighbor] = (current_vertex, weights[0], weights[1])
+                    heapq.heappush(queues[side], (distance, neighbor))
+                    pushes += 1
+
+                if neighbor in other and distances[side][neighbor] + other[neighbor] < best:
+                    best = distances[side][neighbor] + other[neighbor]
+                    meeting = neighbor
+
+        if stats is not None:
+            stats["algorithm"] = "bidirectional_dijkstra"
+            stats["expanded"] = expanded
+            stats["pushes"] = pushes
+            stats["relaxed"] = relaxed
+
+        if meeting is None:
+            return [end], [], 0, 0
+
+        path, path_weights, total_weight1, total_weight2 = self._path_from_previous(previous[0], meeting)
+        current = meeting
+        while current in previous[1]:
+            next_vertex, weight1, weight2 = previous[1][current]
+            path.append(next_vertex)
+            path_weights.append((weight1, weight2))
+            current = next_vertex
+
+        total_weight1 = sum(weight1 for weight1, weight2 in path_weights)
+        total_weight2 = sum(weight2 for weight1, weight2 in path_weights)
+
+        return path, path_weights, total_weight1, total_weight2
+
+    def _path_from_previous(self, previous: dict, end: str):
+        # Reconstruir el camino y calcular los costos
+        path = [end]
+        path_weights = []
+        current = end
+        while current in previous:
+            prev_vertex, weight1, weight2 = previous[current]
+            path.append(prev_vertex)
+            path_weights.append((weight1, weight2))
+            current = prev_vertex
+        path.reverse()
+        path_weights.reverse()
+
+        total_weight1 = sum(weight1 for weight1, weight2 in path_weights)
+        total_weight2 = sum(weight2 for weight1, weight2 in path_weights)
+
+        return path, path_weights, total_weight1, total_weight2
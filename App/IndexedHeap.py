@@ -0,0 +1,82 @@
+class IndexedHeap:
+    """
+    Binary min-heap of keys with comparable priorities that tracks where each key sits, so a key's
+    priority can be lowered in O(log n) instead of pushing a duplicate entry.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.priorities = {}
+        self.positions = {}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key) -> bool:
+        return key in self.positions
+
+    def priority(self, key):
+        return self.priorities[key]
+
+    def push(self, key, priority) -> None:
+        if key in self.positions:
+            raise KeyError(f"{key} ya está en el heap.")
+        self.keys.append(key)
+        self.positions[key] = len(self.keys) - 1
+        self.priorities[key] = priority
+        self._sift_up(len(self.keys) - 1)
+
+    def decrease_key(self, key, priority) -> bool:
+        # Returns False (and changes nothing) when the new priority is not lower than the current one
+        if not priority < self.priorities[key]:
+            return False
+        self.priorities[key] = priority
+        self._sift_up(self.positions[key])
+        return True
+
+    def push_or_decrease(self, key, priority) -> bool:
+        if key in self.positions:
+            return self.decrease_key(key, priority)
+        self.push(key, priority)
+        return True
+
+    def pop(self):
+        key = self.keys[0]
+        last = self.keys.pop()
+        if self.keys:
+            self.keys[0] = last
+            self.positions[last] = 0
+            self._sift_down(0)
+        del self.positions[key]
+        return key, self.priorities.pop(key)
+
+    def _sift_up(self, position: int) -> None:
+        keys, priorities, positions = self.keys, self.priorities, self.positions
+        key = keys[position]
+        while position > 0:
+            parent = (position - 1) // 2
+            if not priorities[key] < priorities[keys[parent]]:
+                break
+            keys[position] = keys[parent]
+            positions[keys[position]] = position
+            position = parent
+        keys[position] = key
+        positions[key] = position
+
+    def _sift_down(self, position: int) -> None:
+        keys, priorities, positions = self.keys, self.priorities, self.positions
+        key = keys[position]
+        size = len(keys)
+        while True:
+            child = 2 * position + 1
+            if child >= size:
+                break
+            if child + 1 < size and priorities[keys[child + 1]] < priorities[keys[child]]:
+                child += 1
+            if not priorities[keys[child]] < priorities[key]:
+                break
+            keys[position] = keys[child]
+            positions[keys[position]] = position
+            position = child
+        keys[position] = key
+        positions[key] = position
@@ -0,0 +1,107 @@
+import time
+import tracemalloc
+
+class Instrument:
+    """
+    Opt-in measurements of the hot paths: wall time per phase, event counters (nodes expanded, heap
+    pushes, edges relaxed...) and, optionally, the peak memory each phase allocated on top of what was
+    already allocated when it started, as traced by tracemalloc.
+
+    While disabled, phase() hands back one shared no-op context and count() returns at once, so the
+    instrumented code pays a method call per phase and nothing inside its loops.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.trace_memory = False
+        self.phases = {}
+        self.counters = {}
+        self._idle = _IdlePhase()
+
+    def enable(self, trace_memory: bool = False) -> None:
+        self.enabled = True
+        self.trace_memory = trace_memory
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def disable(self) -> None:
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.enabled = False
+        self.trace_memory = False
+
+    def reset(self) -> None:
+        self.phases = {}
+        self.counters = {}
+
+    def phase(self, name: str):
+        """
+        Context manager that adds the wall time (and peak traced memory) of its block to the named phase.
+        Phases may be nested; an outer phase's time includes its inner phases, but its peak memory only
+        covers what follows the last inner phase, since tracemalloc keeps a single peak.
+        """
+        if not self.enabled:
+            return self._idle
+        return _Phase(self, name)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def add_stats(self, stats: dict) -> None:
+        """
+        Adds the numeric entries of a search's stats dict (see Graph.dijkstra) to the counters, as
+        "<algorithm>.<entry>".
+        """
+        if self.enabled:
+            algorithm = stats.get("algorithm", "search")
+            for name, value in stats.items():
+                if isinstance(value, (int, float)):
+                    self.count(f"{algorithm}.{name}", value)
+
+    def report(self) -> dict:
+        """
+        Returns the measurements: per phase its calls, total and mean seconds and peak allocated KiB (when
+        memory is traced), and every counter.
+        """
+        phases = {}
+        for name, (calls, seconds, peak) in self.phases.items():
+            phases[name] = {"calls": calls, "total_s": seconds, "mean_s": seconds / calls}
+            if peak is not None:
+                phases[name]["peak_kib"] = round(peak / 1024, 1)
+        return {"phases": phases, "counters": dict(self.counters)}
+
+    def _record(self, name: str, seconds: float, peak) -> None:
+        calls, total, previous_peak = self.phases.get(name, (0, 0.0, None))
+        if peak is not None and previous_peak is not None:
+            peak = max(peak, previous_peak)
+        self.phases[name] = (calls + 1, total + seconds, peak)
+
+class _Phase:
+    __slots__ = ("instrument", "name", "start", "base")
+
+    def __init__(self, instrument: Instrument, name: str):
+        self.instrument = instrument
+        self.name = name
+
+    def __enter__(self):
+        if self.instrument.trace_memory:
+            tracemalloc.reset_peak()
+            self.base = tracemalloc.get_traced_memory()[0]
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        seconds = time.perf_counter() - self.start
+        peak = tracemalloc.get_traced_memory()[1] - self.base if self.instrument.trace_memory else None
+        self.instrument._record(self.name, seconds, peak)
+        return False
+
+class _IdlePhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
@@ -0,0 +1,280 @@
+from collections.abc import Mapping
+
+from DegreeIndex import DegreeIndex
+from Graph import Graph
+
+class LayeredGraph:
+    """
+    One multi-layer flight network in place of a separate graph per category and direction.
+
+    Every (origin, destination) arc is stored once, with a bitmask of the layers (categories) whose
+    flights use it and, for each of those layers, the weights of its best flight in that layer: the
+    minimum distance, ties kept by the earliest flight, as Graph.add_edge keeps them. Any layer is
+    then seen as a directed or undirected Graph through a GraphView, which filters the shared
+    adjacency instead of copying it; the views' degree counters are kept up to date on insertion.
+    """
+
+    def __init__(self):
+        self.layers = []
+        self.vertices = {}
+        # Arcs by origin and by destination; both dictionaries hold the same _Edge objects
+        self.out = {}
+        self.inc = {}
+        # Views of every layer, notified of the arcs their layer gains
+        self.views = []
+
+    def add_layer(self, name: str) -> int:
+        if name in self.layers:
+            raise ValueError(f"La capa {name} ya existe.")
+        self.layers.append(name)
+        self.views.append([])
+        return 1 << (len(self.layers) - 1)
+
+    def bit(self, name: str) -> int:
+        return 1 << self.layers.index(name)
+
+    def view(self, name: str, directed: bool = True) -> "GraphView":
+        view = GraphView(self, self.layers.index(name), directed)
+        self.views[view.layer].append(view)
+        return view
+
+    def clear(self) -> None:
+        self.vertices = {}
+        self.out = {}
+        self.inc = {}
+        for views in self.views:
+            for view in views:
+                view._reset()
+
+    def add_vertex(self, vertex: str) -> None:
+        if vertex not in self.vertices:
+            self.vertices[vertex] = None
+            self.out[vertex] = {}
+            self.inc[vertex] = {}
+            for views in self.views:
+                for view in views:
+                    view._add_vertex(vertex)
+
+    def add_edge(self, vertex1: str, vertex2: str, weight1: float, weight2: float, mask: int) -> None:
+        """
+        Adds a flight to every layer in mask, keeping in each layer the lightest (weight1) flight of the arc.
+        """
+        if vertex1 not in self.vertices:
+            self.add_vertex(vertex1)
+        if vertex2 not in self.vertices:
+            self.add_vertex(vertex2)
+
+        edge, back = self._arc(vertex1, vertex2)
+        weights = (weight1, weight2)
+        for layer in range(len(self.layers)):
+            bit = 1 << layer
+            if mask & bit and self._set(edge, back, vertex1, vertex2, layer, weights):
+                # An undirected view keeps the lighter direction of a pair; on a tie, the one that got there first
+                if back is not None and back is not edge and back.mask & bit and back.weights[layer][0] == weight1:
+                    edge.earlier &= ~bit
+                    back.earlier |= bit
+                else:
+                    edge.earlier |= bit
+
+    def _arc(self, vertex1: str, vertex2: str) -> tuple:
+        # The arc vertex1 -> vertex2 (created if missing) and the opposite arc, if any
+        edge = self.out[vertex1].get(vertex2)
+        if edge is None:
+            edge = _Edge()
+            self.out[vertex1][vertex2] = edge
+            self.inc[vertex2][vertex1] = edge
+        return edge, self.out[vertex2].get(vertex1)
+
+    def _set(self, edge: "_Edge", back: "_Edge", vertex1: str, vertex2: str, layer: int, weights: tuple) -> bool:
+        # Offers weights to the arc's layer; returns whether they became the layer's weights
+        bit = 1 << layer
+        if edge.mask & bit:
+            if edge.weights[layer][0] <= weights[0]:
+                return False
+            edge.weights[layer] = weights
+            for view in self.views[layer]:
+                view._update(vertex1, vertex2)
+            return True
+
+        # The pair is new to the undirected view unless the opposite arc already is in the layer
+        new_pair = back is None or back is edge or not back.mask & bit
+        edge.mask |= bit
+        while len(edge.weights) <= layer:
+            edge.weights.append(None)
+        edge.weights[layer] = weights
+        for view in self.views[layer]:
+            view._count(vertex1, vertex2, new_pair)
+        return True
+
+    def arcs(self):
+        """
+        Yields (origin, destination, mask, earlier, weights) for every arc, origins in insertion order.
+        """
+        for vertex1, edges in self.out.items():
+            for vertex2, edge in edges.items():
+                yield vertex1, vertex2, edge.mask, edge.earlier, edge.weights
+
+    def restore_arc(self, vertex1: str, vertex2: str, mask: int, earlier: int, weights: list) -> None:
+        # Replays an arc produced by arcs(), as loaded back from a snapshot
+        edge, back = self._arc(vertex1, vertex2)
+        for layer in range(len(self.layers)):
+            if mask & (1 << layer):
+                self._set(edge, back, vertex1, vertex2, layer, weights[layer])
+        edge.earlier = earlier
+
+class _Edge:
+    __slots__ = ("mask", "earlier", "weights")
+
+    def __init__(self):
+        self.mask = 0
+        # Layers where this direction's weights reached the pair's minimum weight1 before the opposite direction's
+        self.earlier = 0
+        # Per layer, the (weight1, weight2) of its best flight
+        self.weights = []
+
+def _best(edge: _Edge, back: _Edge, layer: int) -> tuple:
+    # Weights of an undirected pair in a layer: the lighter direction, or the earlier one on a tie
+    bit = 1 << layer
+    if back is None or back is edge or not back.mask & bit:
+        return edge.weights[layer]
+    weights, back_weights = edge.weights[layer], back.weights[layer]
+    if back_weights[0] < weights[0] or back_weights[0] == weights[0] and not edge.earlier & bit:
+        return back_weights
+    return weights
+
+class GraphView(Graph):
+    """
+    A layer of a LayeredGraph seen as a Graph, directed or undirected, so every Graph algorithm runs on
+    it unchanged. Its vertices and reverse are read-only mappings over the shared adjacency; adding an
+    edge to a view adds the flight to its layer, and therefore to the layer's other view as well.
+
+    A vertex's neighbors in the layer are filtered out of the shared arcs on first access and kept as a
+    plain dictionary, so the searches walk dictionaries as on a Graph. Adding a flight drops the kept
+    neighbors of the arc's two ends only.
+    """
+
+    def __init__(self, network: LayeredGraph, layer: int, directed: bool = True):
+        self.network = network
+        self.layer = layer
+        self.directed = directed
+        self.version = 0
+        self._reset()
+
+    def _reset(self) -> None:
+        # Neighbors and predecessors by vertex, for the vertices read since their arcs last changed
+        self._successors = {}
+        self._predecessors = self._successors if not self.directed else {}
+        self.vertices = _Adjacency(self, self.network.out, self._successors, False)
+        self.reverse = _Adjacency(self, self.network.inc, self._predecessors, True) if self.directed else self.vertices
+        self.outdegrees = {}
+        # An undirected pair adds one to each end's in- and out-degree, so both counters are the same
+        self.indegrees = {} if self.directed else self.outdegrees
+        self._degree_index = DegreeIndex()
+        # Vertices whose degree changed since the degree index was last read
+        self._changed = set()
+        for vertex in self.network.vertices:
+            self._add_vertex(vertex)
+        self.version += 1
+        self._sorted_edges = None
+        self._reachability = None
+
+    @property
+    def degree_index(self) -> DegreeIndex:
+        # Degree changes are applied to the index when a ranking reads it, once per changed vertex
+        index = self._degree_index
+        for vertex in self._changed:
+            index.increment(vertex, self.get_degree(vertex) - index.degrees[vertex])
+        self._changed.clear()
+        return index
+
+    def _add_vertex(self, vertex: str) -> None:
+        self.outdegrees[vertex] = 0
+        self.indegrees[vertex] = 0
+        self._degree_index.add(vertex)
+        self.version += 1
+
+    def _update(self, vertex1: str, vertex2: str) -> None:
+        # The arc vertex1 -> vertex2 joined the layer or got lighter weights
+        self._successors.pop(vertex1, None)
+        self._predecessors.pop(vertex2, None)
+        if not self.directed:
+            self._successors.pop(vertex2, None)
+        self.version += 1
+
+    def _count(self, vertex1: str, vertex2: str, new_pair: bool) -> None:
+        if self.directed:
+            self.outdegrees[vertex1] += 1
+            self.indegrees[vertex2] += 1
+        elif new_pair:
+            self.outdegrees[vertex1] += 1
+            if vertex2 != vertex1:
+                self.outdegrees[vertex2] += 1
+        # Even without a new pair, the new direction may be the pair's lighter one
+        self._update(vertex1, vertex2)
+        if self.directed or new_pair:
+            self._changed.add(vertex1)
+            self._changed.add(vertex2)
+
+    def add_vertex(self, vertex: str) -> None:
+        self.network.add_vertex(vertex)
+
+    def add_edge(self, vertex1: str, vertex2: str, weight1: int, weight2: int) -> None:
+        self.network.add_edge(vertex1, vertex2, weight1, weight2, 1 << self.layer)
+
+    def _link(self, vertex1: str, vertex2: str, weight1: int, weight2: int) -> None:
+        raise TypeError("Una vista de capa no admite enlaces directos; use add_edge.")
+
+    def clear(self) -> None:
+        # The layer shares its vertices and arcs with the other layers, so only the whole network can be cleared
+        raise TypeError("Una vista de capa no se puede vaciar; use LayeredGraph.clear.")
+
+    def get_neighbors(self, vertex: str) -> dict:
+        return self.vertices[vertex]
+
+    def get_predecessors(self, vertex: str) -> dict:
+        return self.reverse[vertex]
+
+class _Adjacency(Mapping):
+    # Every vertex of the network, mapped to its successors (or predecessors) in the view's layer
+    __slots__ = ("view", "arcs", "cache", "reverse")
+
+    def __init__(self, view: GraphView, arcs: dict, cache: dict, reverse: bool):
+        self.view = view
+        self.arcs = arcs
+        self.cache = cache
+        self.reverse = reverse
+
+    def __getitem__(self, vertex: str) -> dict:
+        neighbors = self.cache.get(vertex)
+        if neighbors is None:
+            neighbors = _neighbors(self.view, vertex, self.arcs[vertex], self.reverse)
+            self.cache[vertex] = neighbors
+        return neighbors
+
+    def __contains__(self, vertex) -> bool:
+        return vertex in self.arcs
+
+    def __iter__(self):
+        return iter(self.arcs)
+
+    def __len__(self) -> int:
+        return len(self.arcs)
+
+    def items(self):
+        for vertex in self.arcs:
+            yield vertex, self[vertex]
+
+def _neighbors(view: GraphView, vertex: str, arcs: dict, reverse: bool) -> dict:
+    # Neighbors of one vertex in a view, with the layer's weights. An undirected view joins the vertex's
+    # outgoing and incoming arcs, each pair once.
+    layer = view.layer
+    bit = 1 << layer
+    if view.directed:
+        return {neighbor: edge.weights[layer] for neighbor, edge in arcs.items() if edge.mask & bit}
+
+    incoming = view.network.inc[vertex]
+    neighbors = {neighbor: _best(edge, incoming.get(neighbor), layer) for neighbor, edge in arcs.items() if edge.mask & bit}
+    for neighbor, back in incoming.items():
+        if back.mask & bit and neighbor not in neighbors:
+            neighbors[neighbor] = back.weights[layer]
+    return neighbors
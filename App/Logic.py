@@ -1,22 +1,106 @@
 from Airport import Airport
 from Flight import Flight
+from FlightTable import FlightTable
 from Graph import Graph
+from LayeredGraph import LayeredGraph
+from CSRGraph import CSRGraph
+from Category import Category, DIRECTED, UNDIRECTED, BOTH, category_masks
+from SpatialIndex import SpatialIndex
+from Snapshot import file_hash, save_snapshot, load_snapshot
+from RoutingTable import RoutingTable
+from RouteMatrix import RouteMatrix
+from ResultCache import ResultCache, MISS
+from Instrument import Instrument
+from Pipeline import Pipeline
+from RouteStats import RouteStats, STATISTICS, AGGREGATE_COLUMNS
 
 from math import radians, sin, cos, sqrt, atan2
-from typing import Tuple, List, Dict
+from array import array
+import hashlib
+import os
+from typing import Tuple, List, Dict, Set, Iterable, Iterator, Union
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Binary snapshot of the parsed data and built graphs, keyed by the source files' hashes
+SNAPSHOT_FILE = "Data/.cache/snapshot.bin"
 
 # Global data structures
 airports: Dict[str, Airport] = {}
-flights: List[Flight] = []
+flights: FlightTable = FlightTable()
+
+# k-d tree over the airports' coordinates, rebuilt by read_airports
+airport_index = SpatialIndex()
+
+# Ids of the flight batches already applied (a flight file's batch id is its content hash)
+ingested_batches: Set[str] = set()
+
+# Snapshot key (source file hashes) of the data currently loaded by load_data
+loaded_key: Dict[str, str] = {}
+
+# Flight lines set aside by the last streamed load, as (line number, line, reason)
+flight_rejects: List[Tuple[int, str, str]] = []
+
+# Rows per chunk when streaming a flight file through the ingestion pipeline
+STREAM_CHUNK_SIZE = 50000
+
+# Flight table columns read into the route statistics, in RouteStats.add argument order
+ROUTE_STATS_COLUMNS = ("origin", "destination", "plane_type", "traffic", "flight_duration")
+
+# Great-circle distance of every (origin, destination) ICAO pair computed so far
+route_distances: Dict[Tuple[str, str], float] = {}
+
+# Declarative category table: which flights go to which graphs
+categories: List[Category] = [
+    Category("commercial", mode=BOTH, columns={"flight_type": "AVIACION_COMERCIAL"}),
+    Category("military", mode=BOTH, columns={"flight_type": "MILITAR", "traffic": "N"}),
+    Category("cargo", mode=BOTH, columns={"flight_type": "AVIACION_CARGA"}),
+    Category("general", mode=BOTH, columns={}),
+]
+
+# Single multi-layer network with one layer per category; every graph is a directed or undirected view of a layer
+network = LayeredGraph()
+
+# Every graph by name ("<category>_digraph" / "<category>_graph")
+graphs: Dict[str, Graph] = {}
+
+# Flight aggregates by route and by airport of every category, kept up to date as flights are added
+route_stats: Dict[str, RouteStats] = {}
+for category in categories:
+    network.add_layer(category.name)
+    for name, directed in category.graph_names():
+        graphs[name] = network.view(category.name, directed)
+    route_stats[category.name] = RouteStats()
+
+commercial_digraph = graphs["commercial_digraph"]
+commercial_graph = graphs["commercial_graph"]
+military_digraph = graphs["military_digraph"]
+military_graph = graphs["military_graph"]
+cargo_digraph = graphs["cargo_digraph"]
+cargo_graph = graphs["cargo_graph"]
+general_digraph = graphs["general_digraph"]
+general_graph = graphs["general_graph"]
+
+# Compact (CSR) copies of the graphs, which answer the fewest-stops, fastest-route and MST queries, by graph
+# name with the graph version they were built from
+compact_graphs: Dict[str, Tuple[CSRGraph, int]] = {}
+
+# Precomputed all-pairs routing tables by graph name, with the graph version they were built for
+routing_tables: Dict[str, Tuple[RoutingTable, int]] = {}
+
+# Graphs weighted by a route duration statistic, by (graph name, statistic), with the graph and statistics versions
+weighted_graphs: Dict[Tuple[str, str], Tuple[Graph, Tuple[int, int]]] = {}
 
-commercial_digraph = Graph()
-commercial_graph = Graph(False)
-military_digraph = Graph()
-military_graph = Graph(False)
-cargo_digraph = Graph()
-cargo_graph = Graph(False)
-general_digraph = Graph()
-general_graph = Graph(False)
+# Recent route and MST results, keyed by (graph name, origin ICAO, destination ICAO, metric) and tagged with
+# the graph version they were computed on
+RESULT_CACHE_SIZE = 1024
+result_cache = ResultCache(RESULT_CACHE_SIZE)
+
+# Opt-in phase timings and search counters (instrument.enable() turns them on)
+instrument = Instrument()
 
 def read_airports(file_path: str) -> Dict[str, Airport]:
     """
@@ -38,36 +122,174 @@ def read_airports(file_path: str) -> Dict[str, Airport]:
                 int(airport_data[6])
             )
             airports[airport_data[3]] = airport
+
+    index_airports()
     return airports
 
-def read_flights(file_path: str) -> List[Flight]:
+def index_airports() -> None:
+    """
+    Rebuilds the spatial index over the airports' coordinates.
+    """
+    airport_index.build(
+        airports.values(),
+        [(airport.latitude, airport.longitude) for airport in airports.values()],
+        haversine
+    )
+
+def read_flights(file_path: str) -> FlightTable:
     """
-    Reads flight data from a CSV file and returns a list of Flight objects.
+    Reads flight data from a CSV file into the columnar flight table. The file is streamed in chunks
+    through the ingestion pipeline; lines that are malformed or name an unknown airport are skipped
+    and recorded in flight_rejects.
 
     Parameters:
     file_path (str): The path to the CSV file containing flight data.
 
     Returns:
-    List[Flight]: A list of Flight objects.
+    FlightTable: The flight table, whose rows are Flight objects.
     """
-    with open(file_path, 'r') as file:
-        next(file)
-        for line in file:
-            flight_data = line.strip().split(';')
+    pipeline = Pipeline(airports, get_route_distances, STREAM_CHUNK_SIZE)
+    pipeline.add_sink(_table_sink)
+    pipeline.run(file_path)
 
-            origin_lat = airports[flight_data[0]].latitude
-            origin_lon = airports[flight_data[0]].longitude
-            destination_lat = airports[flight_data[2]].latitude
-            destination_lon = airports[flight_data[2]].longitude
+    flight_rejects[:] = pipeline.rejects
+    return flights
 
-            distance = haversine((origin_lat, origin_lon), (destination_lat, destination_lon))
+def stream_flights(file_path: str, keep_flights: bool = True, overlap: bool = True) -> int:
+    """
+    Reads a flight CSV and builds the graphs of every category in a single streaming pass: each chunk
+    of parsed, enriched rows is appended to the flight table and its edges are added to the graphs of
+    the categories it matches, so the raw rows never exist all at once. The graphs end up equal to the
+    ones read_flights and build_graphs produce. Rejected lines are recorded in flight_rejects.
 
-            flight = Flight(
-                flight_data[0], flight_data[1], flight_data[2], flight_data[3],
-                flight_data[4], flight_data[5], flight_data[6], int(flight_data[7]), distance
-            )
-            flights.append(flight)
-    return flights
+    Parameters:
+    file_path (str): The path to the CSV file containing flight data.
+    keep_flights (bool): Whether to also fill the flight table. Without it only the graphs are built,
+    which needs far less memory, but the snapshot and the flight queries need the table.
+    overlap (bool): Whether to parse the next chunk in a background thread while the current one is inserted.
+
+    Returns:
+    int: The number of flights loaded.
+    """
+    for airport in airports.keys():
+        network.add_vertex(airport)
+
+    pipeline = Pipeline(airports, get_route_distances, STREAM_CHUNK_SIZE)
+    if keep_flights:
+        pipeline.add_sink(_table_sink)
+    pipeline.add_sink(_graph_sink)
+    loaded = pipeline.run(file_path, overlap)
+
+    flight_rejects[:] = pipeline.rejects
+    return loaded
+
+def _table_sink(rows: List[tuple]) -> None:
+    for row in rows:
+        flights.add_row(*row)
+
+def _graph_sink(rows: List[tuple]) -> None:
+    layers = [(category, network.bit(category.name), route_stats[category.name]) for category in categories]
+    for row in rows:
+        mask = 0
+        for category, bit, stats in layers:
+            if category.matches(row):
+                mask |= bit
+                stats.add(row[0], row[2], row[4], row[5], row[7])
+        if mask:
+            network.add_edge(row[0], row[2], row[8], row[7], mask)
+    # The table sink runs first, so the chunk's rows are already in the table (when it is kept)
+    for category, bit, stats in layers:
+        stats.rows = len(flights)
+
+def ingest_flights(source: Union[str, Iterable[List[str]]], batch_id: str = None) -> int:
+    """
+    Applies a new batch of flights as a delta: the rows are appended to the flight table and their edges
+    are added to the layers of the matching categories, which update their weights and degree counters only for
+    the vertices involved. Compact graphs of the categories that changed are rebuilt on their next query. A batch
+    whose id was already applied is ignored. The rows are validated like the lines of a flight file: those that
+    are malformed or name an unknown airport are skipped and appended to flight_rejects, with their line number
+    in the batch.
+
+    Parameters:
+    source (Union[str, Iterable[List[str]]]): The path to a flight CSV file (with header), or the rows of the
+    batch as lists of fields in the CSV column order.
+    batch_id (str): The id of the batch. Defaults to the content hash of the file or of the rows.
+
+    Returns:
+    int: The number of flights added (0 if the batch had already been applied).
+    """
+    pipeline = Pipeline(airports, get_route_distances, STREAM_CHUNK_SIZE)
+    if isinstance(source, str):
+        if batch_id is None:
+            batch_id = file_hash(source)
+        if batch_id in ingested_batches:
+            return 0
+        chunks = pipeline.read_chunks(source)
+    else:
+        rows = [list(flight_data) for flight_data in source]
+        if batch_id is None:
+            batch_id = hashlib.sha256("\n".join(";".join(flight_data) for flight_data in rows).encode("utf-8")).hexdigest()
+        if batch_id in ingested_batches:
+            return 0
+        chunks = [(1, [";".join(flight_data) for flight_data in rows])]
+
+    first = len(flights)
+    pipeline.add_sink(_table_sink)
+    pipeline.load(chunks, overlap=False)
+    flight_rejects.extend(pipeline.rejects)
+
+    _add_flights(range(first, len(flights)))
+
+    ingested_batches.add(batch_id)
+    return pipeline.loaded
+
+def get_route_distances(routes: List[Tuple[str, str]]) -> List[float]:
+    """
+    Gets the great-circle distance of many (origin, destination) ICAO pairs. Each distinct pair is
+    computed once, in bulk, and memoized in route_distances.
+
+    Parameters:
+    routes (List[Tuple[str, str]]): The origin and destination ICAO codes of each route.
+
+    Returns:
+    List[float]: The distance of each route in kilometers.
+    """
+    missing = [route for route in dict.fromkeys(routes) if route not in route_distances]
+
+    if missing:
+        origins = [(airports[origin].latitude, airports[origin].longitude) for origin, destination in missing]
+        destinations = [(airports[destination].latitude, airports[destination].longitude) for origin, destination in missing]
+
+        for route, distance in zip(missing, haversine_many(origins, destinations)):
+            route_distances[route] = distance
+
+    return [route_distances[route] for route in routes]
+
+def haversine_many(coords1: List[Tuple[float, float]], coords2: List[Tuple[float, float]]) -> List[float]:
+    """
+    Calculates the great-circle distance between each pair of points, vectorized with NumPy when it is available.
+
+    Parameters:
+    coords1 (List[Tuple[float, float]]): The latitude and longitude of the first point of each pair.
+    coords2 (List[Tuple[float, float]]): The latitude and longitude of the second point of each pair.
+
+    Returns:
+    List[float]: The distance between each pair of points in kilometers.
+    """
+    if np is None:
+        return [haversine(coord1, coord2) for coord1, coord2 in zip(coords1, coords2)]
+
+    lat1, lon1 = np.radians(np.asarray(coords1, dtype=float).reshape(-1, 2)).T
+    lat2, lon2 = np.radians(np.asarray(coords2, dtype=float).reshape(-1, 2)).T
+
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+
+    a = np.sin(dlat / 2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2)**2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    r = 6371  # Radius of the Earth in kilometers
+
+    return (c * r).tolist()
 
 def haversine(coord1: Tuple[float, float], coord2: Tuple[float, float]) -> float:
     """
@@ -105,128 +327,560 @@ def find_nearest_airport(lat: float, lon: float) -> Airport:
     Returns:
     Airport: The nearest Airport object or None if no airport is within 30 km.
     """
-    nearest_airport = None
-    nearest_distance = float('inf')
+    nearest = airport_index.nearest(lat, lon, 30)
+    return nearest[0] if nearest is not None else None
+
+def find_nearest_airports(coordinates: List[Tuple[float, float]], radius: float = 30) -> List[Airport]:
+    """
+    Finds the nearest airport within the given radius of each coordinate in one call.
+
+    Parameters:
+    coordinates (List[Tuple[float, float]]): The latitude and longitude of each point.
+    radius (float): The search radius in kilometers.
+
+    Returns:
+    List[Airport]: The nearest Airport object for each point, or None where no airport is within the radius.
+    """
+    return [
+        nearest[0] if nearest is not None else None
+        for nearest in airport_index.nearest_many(coordinates, radius)
+    ]
+
+def resolve_route_pairs(pairs: List[Tuple[float, float, float, float]]) -> List[Tuple[Airport, Airport]]:
+    """
+    Resolves many origin/destination coordinate pairs to their nearest airports (30 km radius) in one call.
+
+    Parameters:
+    pairs (List[Tuple[float, float, float, float]]): The origin latitude, origin longitude, destination latitude and destination longitude of each pair.
+
+    Returns:
+    List[Tuple[Airport, Airport]]: The origin and destination Airport objects of each pair (None where no airport is within 30 km).
+    """
+    coordinates = []
+    for origin_lat, origin_lon, destination_lat, destination_lon in pairs:
+        coordinates.append((origin_lat, origin_lon))
+        coordinates.append((destination_lat, destination_lon))
+
+    resolved = find_nearest_airports(coordinates)
+    return list(zip(resolved[0::2], resolved[1::2]))
+
+def find_k_nearest_airports(lat: float, lon: float, k: int, radius: float = None) -> List[Tuple[Airport, float]]:
+    """
+    Finds the k airports closest to the given coordinates.
+
+    Parameters:
+    lat (float): The latitude of the point.
+    lon (float): The longitude of the point.
+    k (int): The number of airports to return.
+    radius (float): If given, only airports within this many kilometers are considered.
+
+    Returns:
+    List[Tuple[Airport, float]]: The airports and their distances in kilometers, nearest first.
+    """
+    return airport_index.k_nearest(lat, lon, k, radius)
+
+def find_airports_within(lat: float, lon: float, radius: float) -> List[Tuple[Airport, float]]:
+    """
+    Finds every airport within the given radius of the coordinates.
+
+    Parameters:
+    lat (float): The latitude of the point.
+    lon (float): The longitude of the point.
+    radius (float): The search radius in kilometers.
+
+    Returns:
+    List[Tuple[Airport, float]]: The airports and their distances in kilometers, nearest first.
+    """
+    return airport_index.within(lat, lon, radius)
 
-    for airport in airports.values():
-        distance = haversine((lat, lon), (airport.latitude, airport.longitude))
-        if distance < nearest_distance and distance <= 30:
-            nearest_distance = distance
-            nearest_airport = airport
+def register_category(category: Category) -> None:
+    """
+    Adds a category to the category table and creates its layer and graphs. The graphs are filled on the next build_graphs call.
 
-    return nearest_airport
+    Parameters:
+    category (Category): The category to add, e.g. Category("international", lambda flight: flight.traffic == "I", DIRECTED).
+    """
+    for name, directed in category.graph_names():
+        if name in graphs:
+            raise ValueError(f"El grafo {name} ya existe.")
+    network.add_layer(category.name)
+    for name, directed in category.graph_names():
+        graphs[name] = network.view(category.name, directed)
+    route_stats[category.name] = RouteStats()
+    categories.append(category)
 
 def build_graphs() -> None:
     """
-    Builds the graphs for commercial, military, cargo, and general aviation flights.
+    Builds the graphs of every category in the category table in one pass over the flight table: the
+    categories of each flight are read from its encoded columns, and the flight is added once to the
+    network, in the layers of all of them.
     """
     for airport in airports.keys():
-        commercial_digraph.add_vertex(airport)
-        commercial_graph.add_vertex(airport)
-        military_digraph.add_vertex(airport)
-        military_graph.add_vertex(airport)
-        cargo_digraph.add_vertex(airport)
-        cargo_graph.add_vertex(airport)
-        general_digraph.add_vertex(airport)
-        general_graph.add_vertex(airport)
-
-    for flight in flights:
-        if flight.flight_type == "AVIACION_COMERCIAL":
-            if flight.origin not in commercial_digraph.get_vertices():
-                commercial_digraph.add_vertex(flight.origin)
-                commercial_graph.add_vertex(flight.origin)
-            if flight.destination not in commercial_digraph.get_vertices():
-                commercial_digraph.add_vertex(flight.destination)
-                commercial_graph.add_vertex(flight.destination)
-
-            commercial_digraph.add_edge(flight.origin, flight.destination, flight.flight_distance, flight.flight_duration)
-            commercial_graph.add_edge(flight.origin, flight.destination, flight.flight_distance, flight.flight_duration)
-
-        elif flight.flight_type == "MILITAR" and flight.traffic == "N":
-            if flight.origin not in military_digraph.get_vertices():
-                military_digraph.add_vertex(flight.origin)
-                military_graph.add_vertex(flight.origin)
-            if flight.destination not in military_digraph.get_vertices():
-                military_digraph.add_vertex(flight.destination)
-                military_graph.add_vertex(flight.destination)
-
-            military_digraph.add_edge(flight.origin, flight.destination, flight.flight_distance, flight.flight_duration)
-            military_graph.add_edge(flight.origin, flight.destination, flight.flight_distance, flight.flight_duration)
-
-        elif flight.flight_type == "AVIACION_CARGA":
-            if flight.origin not in cargo_digraph.get_vertices():
-                cargo_digraph.add_vertex(flight.origin)
-                cargo_graph.add_vertex(flight.origin)
-            if flight.destination not in cargo_digraph.get_vertices():
-                cargo_digraph.add_vertex(flight.destination)
-                cargo_graph.add_vertex(flight.destination)
-
-            cargo_digraph.add_edge(flight.origin, flight.destination, flight.flight_distance, flight.flight_duration)
-            cargo_graph.add_edge(flight.origin, flight.destination, flight.flight_distance, flight.flight_duration)
-
-        
-        if flight.origin not in general_digraph.get_vertices():
-            general_digraph.add_vertex(flight.origin)
-            general_graph.add_vertex(flight.origin)
-        if flight.destination not in general_digraph.get_vertices():
-            general_digraph.add_vertex(flight.destination)
-            general_graph.add_vertex(flight.destination)
-
-        general_digraph.add_edge(flight.origin, flight.destination, flight.flight_distance, flight.flight_duration)
-        general_graph.add_edge(flight.origin, flight.destination, flight.flight_distance, flight.flight_duration)
-
-def get_airports_degree(graph: Graph) -> Dict[int, List[str]]:
-    """
-    Gets the degree of each airport in the given graph.
+        network.add_vertex(airport)
+
+    _add_flights(range(len(flights)))
+
+def _add_flights(rows: range) -> int:
+    # Adds a contiguous range of flight table rows to the network and to the route statistics of their
+    # categories (skipping the rows a category's statistics already hold); returns the layers they touched
+    masks = category_masks(categories, [network.bit(category.name) for category in categories], flights, rows)
+    layers = [(network.bit(category.name), route_stats[category.name]) for category in categories]
+    folded = [(bit, stats, stats.rows) for bit, stats in layers]
+
+    # The statistics (and their rows watermark) of the categories in each mask, built as masks appear
+    targets = {}
+
+    changed = 0
+    records = zip(rows, masks, flights.edges(rows), flights.records(ROUTE_STATS_COLUMNS, rows))
+    for row, mask, (origin, destination, distance, duration), record in records:
+        if mask:
+            network.add_edge(origin, destination, distance, duration, mask)
+            changed |= mask
+            if mask not in targets:
+                targets[mask] = [(stats, seen) for bit, stats, seen in folded if mask & bit]
+            for stats, seen in targets[mask]:
+                if row >= seen:
+                    stats.add(*record)
+
+    for bit, stats in layers:
+        stats.rows = max(stats.rows, rows.stop)
+    return changed
+
+def get_compact_graph(graph_name: str) -> CSRGraph:
+    """
+    Gets the compact integer-indexed (CSR) copy of a graph, built on first use and rebuilt only after the
+    graph changes. It answers bfs_path, dijkstra and prim with the same results as the graph itself, and
+    find_path, shortest_path and find_mst run their searches on it.
 
     Parameters:
-    graph (Graph): The graph to analyze.
+    graph_name (str): The name of the graph, e.g. "commercial_digraph".
+
+    Returns:
+    CSRGraph: The compact copy of the graph.
+    """
+    graph = graphs[graph_name]
+    if graph_name not in compact_graphs or compact_graphs[graph_name][1] != graph.version:
+        compact_graphs[graph_name] = (CSRGraph.from_graph(graph), graph.version)
+    return compact_graphs[graph_name][0]
+
+def build_compact_graphs() -> Dict[str, CSRGraph]:
+    """
+    Builds (or reuses) the compact CSR copy of the graphs of every category.
+
+    Returns:
+    Dict[str, CSRGraph]: A dictionary with graph names (e.g. "commercial_digraph") as keys and CSRGraph objects as values.
+    """
+    return {name: get_compact_graph(name) for name in graphs}
+
+def load_data(airports_file: str, flights_file: str, snapshot_file: str = SNAPSHOT_FILE) -> Tuple[Dict[str, Airport], FlightTable]:
+    """
+    Loads the airports and flights and builds the graphs. When the snapshot file was built from the same
+    source files (same content hashes), the flight table's columns are read in place from the memory-mapped
+    file and the network is replayed from its arc arrays instead of parsing the CSV files; otherwise the files are parsed and the snapshot is rebuilt. Loading the files that are already loaded
+    does nothing, so batches ingested since then are kept.
+
+    Parameters:
+    airports_file (str): The path to the CSV file containing airport data.
+    flights_file (str): The path to the CSV file containing flight data.
+    snapshot_file (str): The path of the snapshot, or None to always parse the CSV files.
+
+    Returns:
+    Tuple[Dict[str, Airport], FlightTable]: The airports and the flight table.
+    """
+    key = _snapshot_key(airports_file, flights_file)
+    if loaded_key == key:
+        return airports, flights
+
+    with instrument.phase("load.snapshot"):
+        restored = snapshot_file is not None and _restore_snapshot(snapshot_file, key)
+
+    if not restored:
+        _clear_data()
+        with instrument.phase("load.read_airports"):
+            read_airports(airports_file)
+        with instrument.phase("load.stream_flights"):
+            stream_flights(flights_file)
+        if snapshot_file is not None:
+            with instrument.phase("load.write_snapshot"):
+                _write_snapshot(snapshot_file, key)
+
+    loaded_key.clear()
+    loaded_key.update(key)
+    ingested_batches.add(key["flights"])
+    return airports, flights
+
+def warm_cache(airports_file: str, flights_file: str, snapshot_file: str = SNAPSHOT_FILE) -> bool:
+    """
+    Makes sure the snapshot for the given source files exists and is current, building it if needed.
+
+    Parameters:
+    airports_file (str): The path to the CSV file containing airport data.
+    flights_file (str): The path to the CSV file containing flight data.
+    snapshot_file (str): The path of the snapshot.
+
+    Returns:
+    bool: True if the snapshot had to be (re)built, False if it was already current.
+    """
+    key = _snapshot_key(airports_file, flights_file)
+    if _restore_snapshot(snapshot_file, key):
+        rebuilt = False
+    else:
+        _clear_data()
+        read_airports(airports_file)
+        stream_flights(flights_file)
+        _write_snapshot(snapshot_file, key)
+        rebuilt = True
+
+    loaded_key.clear()
+    loaded_key.update(key)
+    ingested_batches.add(key["flights"])
+    return rebuilt
+
+def _clear_data() -> None:
+    airports.clear()
+    flights.clear()
+    flight_rejects.clear()
+    ingested_batches.clear()
+    loaded_key.clear()
+    compact_graphs.clear()
+    route_distances.clear()
+    network.clear()
+    for stats in route_stats.values():
+        stats.clear()
+
+def _snapshot_key(airports_file: str, flights_file: str) -> dict:
+    return {
+        "airports": file_hash(airports_file),
+        "flights": file_hash(flights_file),
+        "graphs": sorted(graphs.keys()),
+        "layers": network.layers,
+        "route_stats": list(ROUTE_STATS_COLUMNS),
+    }
+
+def _write_snapshot(snapshot_file: str, key: dict) -> None:
+    metadata = {
+        "airports": [[airport.name, airport.city, airport.country, airport.icao] for airport in airports.values()],
+        "flights": flights.dictionaries,
+        "graphs": {},
+    }
+    sections = {
+        "airports.latitude": array('d', (airport.latitude for airport in airports.values())),
+        "airports.longitude": array('d', (airport.longitude for airport in airports.values())),
+        "airports.altitude": array('q', (airport.altitude for airport in airports.values())),
+    }
+    for column, data in flights.columns.items():
+        sections[f"flights.{column}"] = data
+
+    # The network as its arcs in insertion order, with every layer's weights (zero where the arc is not in the layer)
+    ids = {vertex: i for i, vertex in enumerate(network.vertices)}
+    metadata["graphs"] = {"vertices": list(network.vertices)}
+    tails, heads, masks, earlier = array('q'), array('q'), array('q'), array('q')
+    layers = range(len(network.layers))
+    distances = [array('d') for layer in layers]
+    durations = [array('q') for layer in layers]
+    for vertex1, vertex2, mask, arc_earlier, weights in network.arcs():
+        tails.append(ids[vertex1])
+        heads.append(ids[vertex2])
+        masks.append(mask)
+        earlier.append(arc_earlier)
+        for layer in layers:
+            present = mask & (1 << layer)
+            distances[layer].append(weights[layer][0] if present else 0)
+            durations[layer].append(weights[layer][1] if present else 0)
+
+    sections["graphs.tails"] = tails
+    sections["graphs.heads"] = heads
+    sections["graphs.masks"] = masks
+    sections["graphs.earlier"] = earlier
+    for layer, name in enumerate(network.layers):
+        sections[f"graphs.{name}.distances"] = distances[layer]
+        sections[f"graphs.{name}.durations"] = durations[layer]
+
+    metadata["route_stats"] = {}
+    for name, stats in route_stats.items():
+        metadata["route_stats"][name], stats_sections = stats.snapshot()
+        for column, data in stats_sections.items():
+            sections[f"route_stats.{name}.{column}"] = data
+
+    save_snapshot(snapshot_file, key, metadata, sections)
+
+def _restore_snapshot(snapshot_file: str, key: dict) -> bool:
+    snapshot = load_snapshot(snapshot_file, key)
+    if snapshot is None:
+        return False
+    metadata, sections = snapshot
+
+    _clear_data()
+    for i, (name, city, country, icao) in enumerate(metadata["airports"]):
+        airports[icao] = Airport(
+            name, city, country, icao,
+            sections["airports.latitude"][i], sections["airports.longitude"][i], sections["airports.altitude"][i]
+        )
+    index_airports()
+
+    flights.restore(
+        metadata["flights"],
+        {column: sections[f"flights.{column}"] for column in flights.columns}
+    )
+
+    vertices = metadata["graphs"]["vertices"]
+    for vertex in vertices:
+        network.add_vertex(vertex)
+    layers = [(sections[f"graphs.{name}.distances"], sections[f"graphs.{name}.durations"]) for name in network.layers]
+    arcs = zip(sections["graphs.tails"], sections["graphs.heads"], sections["graphs.masks"], sections["graphs.earlier"])
+    for arc, (tail, head, mask, earlier) in enumerate(arcs):
+        network.restore_arc(
+            vertices[tail], vertices[head], mask, earlier,
+            [(distances[arc], durations[arc]) for distances, durations in layers]
+        )
+
+    for name, stats in route_stats.items():
+        stats.restore(metadata["route_stats"][name], {column: sections[f"route_stats.{name}.{column}"] for column in AGGREGATE_COLUMNS})
+
+    return True
+
+def build_routing_table(graph_name: str = "commercial_digraph", processes: int = None, cache_dir: str = os.path.dirname(SNAPSHOT_FILE)) -> RoutingTable:
+    """
+    Builds (or reuses) the all-pairs fastest-route table of a graph, which shortest_path then answers from
+    in O(path length). The table is stored next to the data snapshot and is only recomputed when the
+    graph's content changes.
+
+    Parameters:
+    graph_name (str): The name of the graph, e.g. "commercial_digraph".
+    processes (int): The size of the process pool running the one-to-all searches (defaults to the CPU count).
+    cache_dir (str): The directory where tables are stored, or None to keep them only in memory.
+
+    Returns:
+    RoutingTable: The routing table of the graph.
+    """
+    graph = graphs[graph_name]
+    if graph_name in routing_tables and routing_tables[graph_name][1] == graph.version:
+        return routing_tables[graph_name][0]
+
+    csr = get_compact_graph(graph_name)
+    fingerprint = csr.fingerprint()
+    table_file = os.path.join(cache_dir, f"routes-{graph_name}.bin") if cache_dir is not None else None
+
+    table = None
+    if graph_name in routing_tables and routing_tables[graph_name][0].fingerprint == fingerprint:
+        table = routing_tables[graph_name][0]
+    elif table_file is not None:
+        table = RoutingTable.load(table_file, fingerprint)
+
+    if table is None:
+        table = RoutingTable.build(csr, processes)
+        if table_file is not None:
+            table.save(table_file)
+
+    routing_tables[graph_name] = (table, graph.version)
+    return table
+
+def get_routing_table(graph_name: str) -> RoutingTable:
+    """
+    Returns the routing table of a graph if one was built and the graph has not changed since, otherwise None.
+    """
+    if graph_name in routing_tables and routing_tables[graph_name][1] == graphs[graph_name].version:
+        return routing_tables[graph_name][0]
+    return None
+
+def get_route_stats(origin: str, destination: str, category: str = "general", directed: bool = True) -> Dict[str, object]:
+    """
+    Gets the aggregate figures of the flights of a category on a route, read from the route statistics
+    index instead of scanning the flight table.
+
+    Parameters:
+    origin (str): The ICAO code of the origin airport.
+    destination (str): The ICAO code of the destination airport.
+    category (str): The name of the category, e.g. "commercial".
+    directed (bool): Whether to count only the flights from origin to destination, or those in both directions.
+
+    Returns:
+    Dict[str, object]: The number of flights, min/max/mean/median duration, variance and standard deviation,
+    and the flights by plane type and by traffic; None if no flight of the category flies the route.
+    """
+    stats = route_stats[category].route(origin, destination, directed)
+    return None if stats is None else stats.summary()
+
+def get_airport_stats(icao: str, category: str = "general") -> Dict[str, Dict[str, object]]:
+    """
+    Gets the aggregate figures of the flights of a category departing from and arriving at an airport.
+
+    Parameters:
+    icao (str): The ICAO code of the airport.
+    category (str): The name of the category, e.g. "commercial".
 
     Returns:
-    Dict[int, List[str]]: A dictionary with degrees as keys and lists of airport ICAO codes as values.
+    Dict[str, Dict[str, object]]: The "departures" and "arrivals" figures (as get_route_stats returns them),
+    each None when there are no such flights.
     """
-    degrees = {}
-    for vertex in graph.get_vertices():
-        degree = graph.get_degree(vertex)
-        if degree not in degrees:
-            degrees[degree] = []
-        degrees[degree].append(vertex)
-    return degrees
+    departures, arrivals = route_stats[category].airport(icao)
+    return {
+        "departures": None if departures is None else departures.summary(),
+        "arrivals": None if arrivals is None else arrivals.summary(),
+    }
 
-def find_path(origin_lat: float, origin_lon: float, destination_lat: float, destination_lon: float) -> Tuple[List[Tuple[str, str, str, str, float, float, float, float]], float, float]:
+def weighted_graph(graph_name: str, statistic: str = "mean") -> Graph:
     """
-    Finds a basic route from the origin to the destination using the commercial digraph.
+    Gets a copy of a graph whose flight time on each edge is the mean or median duration of the route's
+    flights instead of the duration of its shortest flight. It is derived from the graph and the route
+    statistics, without reading the flights again, and kept until either of them changes.
+
+    Parameters:
+    graph_name (str): The name of the graph, e.g. "commercial_digraph".
+    statistic (str): "mean" or "median".
+
+    Returns:
+    Graph: The weighted graph.
+    """
+    if statistic not in STATISTICS:
+        raise ValueError(f"Estadística no válida: {statistic}")
+    graph = graphs[graph_name]
+    stats = route_stats[_graph_category(graph_name).name]
+    version = (graph.version, stats.version)
+    key = (graph_name, statistic)
+    if key in weighted_graphs and weighted_graphs[key][1] == version:
+        return weighted_graphs[key][0]
+
+    weighted = stats.weighted(graph, statistic)
+    weighted_graphs[key] = (weighted, version)
+    return weighted
+
+def _graph_category(graph_name: str) -> Category:
+    for category in categories:
+        if any(name == graph_name for name, directed in category.graph_names()):
+            return category
+    raise KeyError(graph_name)
+
+def find_path(origin_lat: float, origin_lon: float, destination_lat: float, destination_lon: float, bidirectional: bool = False) -> Tuple[List[Tuple[str, str, str, str, float, float, float, float]], float, float]:
+    """
+    Finds a route with the fewest stops from the origin to the destination using the commercial digraph.
 
     Parameters:
     origin_lat (float): The latitude of the origin.
     origin_lon (float): The longitude of the origin.
     destination_lat (float): The latitude of the destination.
     destination_lon (float): The longitude of the destination.
+    bidirectional (bool): Whether to search from both ends at once, which expands far fewer airports. It finds a
+    route with the same number of stops, but among equally short routes it may return a different one than the
+    forward search.
 
     Returns:
     Tuple[List[Tuple[str, str, str, str, float, float, float, float]], float, float]: The path information, total distance, and total time.
     """
-    origin_airport = find_nearest_airport(origin_lat, origin_lon)
-    destination_airport = find_nearest_airport(destination_lat, destination_lon)
+    with instrument.phase("find_path.nearest_airport"):
+        origin_airport = find_nearest_airport(origin_lat, origin_lon)
+        destination_airport = find_nearest_airport(destination_lat, destination_lon)
 
     if origin_airport is None or destination_airport is None:
         return [], 0, 0
+    elif not _may_reach(commercial_digraph, origin_airport.icao, destination_airport.icao):
+        instrument.count("find_path.unreachable")
+        return [], 0, 0
     else:
-        path = commercial_digraph.bfs_path(origin_airport.icao, destination_airport.icao)
-        path_info = []
+        key = ("commercial_digraph", origin_airport.icao, destination_airport.icao, "stops_bidirectional" if bidirectional else "stops")
+        result = result_cache.get(key, commercial_digraph.version)
+        if result is MISS:
+            with instrument.phase("find_path.search"):
+                if bidirectional:
+                    path = commercial_digraph.bfs_path(origin_airport.icao, destination_airport.icao, True)
+                else:
+                    path = get_compact_graph("commercial_digraph").bfs_path(origin_airport.icao, destination_airport.icao)
+            with instrument.phase("find_path.format"):
+                result = _describe_path(path)
+            result_cache.put(key, commercial_digraph.version, result)
+        else:
+            instrument.count("find_path.cache_hits")
+        return result
+
+def find_paths_from(origin_lat: float, origin_lon: float) -> Dict[str, Tuple[List[Tuple[str, str, str, str, float, float, float, float]], float, float]]:
+    """
+    Finds a route with the fewest stops from the origin to every reachable airport of the commercial digraph
+    in a single traversal.
+
+    Parameters:
+    origin_lat (float): The latitude of the origin.
+    origin_lon (float): The longitude of the origin.
+
+    Returns:
+    Dict[str, Tuple[List[Tuple[str, str, str, str, float, float, float, float]], float, float]]: The path information,
+    total distance, and total time of the route to each destination, by ICAO code.
+    """
+    origin_airport = find_nearest_airport(origin_lat, origin_lon)
+    if origin_airport is None:
+        return {}
+
+    tree = commercial_digraph.bfs_tree(origin_airport.icao)
+    return {
+        icao: _describe_path(Graph.tree_path(tree, icao))
+        for icao in tree if icao != origin_airport.icao
+    }
+
+def get_profile() -> Dict[str, Dict[str, object]]:
+    """
+    Gets the measurements collected while the instrumentation was enabled (see Instrument).
+
+    Returns:
+    Dict[str, Dict[str, object]]: The calls, total and mean seconds (and peak traced memory) of every phase, and the counters.
+    """
+    return instrument.report()
+
+def get_cache_stats() -> Dict[str, float]:
+    """
+    Gets the statistics of the route and MST result cache.
+
+    Returns:
+    Dict[str, float]: The number of cached results, the cache's capacity, hits, misses, evictions and hit rate.
+    """
+    return result_cache.stats()
+
+def _may_reach(graph: Graph, origin: str, destination: str) -> bool:
+    # False only when both airports are in the graph and no route joins them; the searches handle the rest
+    if origin == destination or not graph.has_vertex(origin) or not graph.has_vertex(destination):
+        return True
+    return graph.reachability().reachable(origin, destination)
+
+def get_component_report(graph_name: str) -> Dict[str, object]:
+    """
+    Summarizes the connectivity of a graph: its strongly connected components and condensation DAG for a
+    digraph, or its connected components for an undirected graph.
+
+    Parameters:
+    graph_name (str): The name of the graph (e.g. "commercial_digraph", "cargo_graph").
 
-        total_time = 0
-        total_distance = 0
+    Returns:
+    Dict[str, object]: The number of vertices and components, the largest component's size, the number of
+    single-airport components, every component's size (largest first) and, for digraphs, the number of
+    condensation edges, source components and sink components.
+    """
+    return graphs[graph_name].reachability().report()
+
+def get_components(graph_name: str) -> List[List[str]]:
+    """
+    Gets the ICAO codes of the airports of every (strongly) connected component of a graph, largest first.
 
-        for node in path:
-            airport = node[0]
+    Parameters:
+    graph_name (str): The name of the graph.
+
+    Returns:
+    List[List[str]]: The airports of each component.
+    """
+    return graphs[graph_name].reachability().components()
 
-            total_distance += node[1][0]
-            total_time += node[1][1]
+def _describe_path(path: List[Tuple[str, Tuple[float, float]]]) -> Tuple[List[Tuple[str, str, str, str, float, float, float, float]], float, float]:
+    path_info = []
 
-            path_info.append((airports[airport].icao, airports[airport].name, airports[airport].city, airports[airport].country, node[1][0], node[1][1], total_distance, total_time))
+    total_time = 0
+    total_distance = 0
 
-        return path_info, total_distance, total_time
+    for node in path:
+        airport = node[0]
+
+        total_distance += node[1][0]
+        total_time += node[1][1]
+
+        path_info.append((airports[airport].icao, airports[airport].name, airports[airport].city, airports[airport].country, node[1][0], node[1][1], total_distance, total_time))
+
+    return path_info, total_distance, total_time
 
 def find_max_degree(graph: Graph) -> Tuple[str, int]:
     """
@@ -238,123 +892,335 @@ def find_max_degree(graph: Graph) -> Tuple[str, int]:
     Returns:
     Tuple[str, int]: The ICAO code of the airport with the maximum degree and the degree.
     """
-    max_degree = 0
-    max_degree_airport = None
-    for vertex in graph.get_vertices():
-        degree = graph.get_degree(vertex)
-        if degree > max_degree:
-            max_degree = degree
-            max_degree_airport = vertex
-    return max_degree_airport, max_degree
+    ranked = graph.top_by_degree(1)
+    if not ranked or ranked[0][1] == 0:
+        return None, 0
+    return ranked[0]
+
+def get_top_airports(graph: Graph, n: int, country: str = None) -> List[Tuple[str, str, str, int]]:
+    """
+    Gets the N airports with the highest degree in the given graph, using the graph's degree index.
+
+    Parameters:
+    graph (Graph): The graph to analyze.
+    n (int): The number of airports to return.
+    country (str): If given, only airports in this country are considered.
+
+    Returns:
+    List[Tuple[str, str, str, int]]: The name, ICAO code, city and degree of each airport.
+    """
+    return _describe_ranking(graph.top_by_degree(n, _country_filter(country)))
+
+def get_bottom_airports(graph: Graph, n: int, country: str = None) -> List[Tuple[str, str, str, int]]:
+    """
+    Gets the N airports with the lowest degree in the given graph, using the graph's degree index.
 
-def find_mst(graph_type: str) -> Tuple[List[List[Tuple[str, Tuple[float, float]]]], Airport, int, float, int, float]:
+    Parameters:
+    graph (Graph): The graph to analyze.
+    n (int): The number of airports to return.
+    country (str): If given, only airports in this country are considered.
+
+    Returns:
+    List[Tuple[str, str, str, int]]: The name, ICAO code, city and degree of each airport.
+    """
+    return _describe_ranking(graph.bottom_by_degree(n, _country_filter(country)))
+
+def _country_filter(country: str):
+    if country is None:
+        return None
+    return lambda icao: airports[icao].country == country
+
+def _describe_ranking(ranking: List[Tuple[str, int]]) -> List[Tuple[str, str, str, int]]:
+    return [
+        (airports[icao].name, airports[icao].icao, airports[icao].city, degree)
+        for icao, degree in ranking
+    ]
+
+def find_mst(graph_type: str, algorithm: str = "auto") -> Tuple[Iterator[List[Tuple[str, Tuple[float, float], Tuple[float, float]]]], Airport, int, float, int, float]:
     """
     Finds the most connected airport and its minimum spanning tree for a given graph type.
 
     Parameters:
     graph_type (str): The type of graph ("commercial", "military", "cargo").
+    algorithm (str): "prim" (indexed heap), "lazy_prim", "kruskal", or "auto" for Prim over the graph's compact copy.
+    Every algorithm yields the same tree.
 
     Returns:
-    Tuple[List[List[Tuple[str, Tuple[float, float]]]], Airport, int, float, int, float]: The branches of the MST, the most connected airport, its degree, total distance, total segments, and total time.
+    Tuple[Iterator[List[Tuple[str, Tuple[float, float], Tuple[float, float]]]], Airport, int, float, int, float]: The branches of
+    the MST (yielded lazily, each step with its weights and the cumulative distance and time), the most connected airport,
+    its degree, total distance, total segments, and total time.
     """
-    if graph_type == "commercial":
-        airport, degree = find_max_degree(commercial_graph)
-        mst, distance, time = commercial_graph.prim(airport)
-    elif graph_type == "military":
-        airport, degree = find_max_degree(military_graph)
-        mst, distance, time = military_graph.prim(airport)
-    elif graph_type == "cargo":
-        airport, degree = find_max_degree(cargo_graph)
-        mst, distance, time = cargo_graph.prim(airport)
+    graph_name = f"{graph_type}_graph"
+    graph = graphs[graph_name]
+    with instrument.phase("find_mst.ranking"):
+        airport, degree = find_max_degree(graph)
+
+    key = (graph_name, airport, None, f"mst_{algorithm}")
+    result = result_cache.get(key, graph.version)
+    if result is MISS:
+        with instrument.phase("find_mst.mst"):
+            if algorithm in ("auto", "lazy_prim"):
+                mst, distance, time = get_compact_graph(graph_name).prim(airport)
+            else:
+                mst, distance, time = graph.minimum_spanning_tree(airport, algorithm)
+        with instrument.phase("find_mst.count_branches"):
+            result = (mst, distance, mst.count_branches(airport), time)
+        result_cache.put(key, graph.version, result)
+    else:
+        instrument.count("find_mst.cache_hits")
+    mst, distance, trayects, time = result
+
+    return mst.iter_branches(airport), airports[airport], degree, distance, trayects, time
 
-    branches = mst.find_branches(airport)
+def find_spanning_forest(graph_type: str, algorithm: str = "auto") -> List[Tuple[str, int, float, float, int]]:
+    """
+    Finds the minimum spanning tree of every connected component of a graph type, largest component first.
 
-    return branches, airports[airport], degree, distance, len(branches), time
+    Parameters:
+    graph_type (str): The type of graph ("commercial", "military", "cargo", "general").
+    algorithm (str): "kruskal", "prim", "lazy_prim", or "auto" to choose by the graph's density.
 
-def top_n_mst(top: int) -> Tuple[str, int, List[List[Tuple[str, Tuple[float, float]]]], float, float]:
+    Returns:
+    List[Tuple[str, int, float, float, int]]: For each component, its first airport's ICAO code, number of airports,
+    total distance, total time, and number of branches from that airport.
+    """
+    forest = graphs[f"{graph_type}_graph"].spanning_forest(algorithm)
+    components = [
+        (root, len(tree.get_vertices()), distance, time, tree.count_branches(root))
+        for root, tree, distance, time in forest
+    ]
+    components.sort(key=lambda component: -component[1])
+    return components
+
+def top_n_mst(top: int) -> Tuple[str, int, Iterator[List[Tuple[str, Tuple[float, float], Tuple[float, float]]]], float, float]:
     """
-    Finds the top N airports in Colombia by degree and builds an MST.
+    Finds the top N airports in Colombia by degree and builds an MST. Raises ValueError if top is less than 1
+    or there are no airports in Colombia to rank.
 
     Parameters:
     top (int): The number of top airports to consider.
 
     Returns:
-    Tuple[str, int, List[List[Tuple[str, Tuple[float, float]]]], float, float]: The ICAO code, degree, MST branches, total distance, and total time.
+    Tuple[str, int, Iterator[List[Tuple[str, Tuple[float, float], Tuple[float, float]]]], float, float]: The ICAO code, degree,
+    MST branches (yielded lazily), total distance, and total time.
     """
-    degreeMap = get_airports_degree(commercial_digraph)
-    degree_commercial_sorted = sorted(degreeMap.keys(), reverse=True)
+    if top < 1:
+        raise ValueError(f"El número de aeropuertos debe ser al menos 1: {top}")
 
-    top_n_airports = []
+    with instrument.phase("top_n_mst.ranking"):
+        top_n_airports = get_top_airports(commercial_digraph, top, "Colombia")
+    if not top_n_airports:
+        raise ValueError("No hay aeropuertos en Colombia para clasificar.")
 
-    for degree in degree_commercial_sorted:
-        if len(top_n_airports) >= top:
-            break
-        if isinstance(degreeMap[degree], list):
-            for airport in degreeMap[degree]:
-                if len(top_n_airports) >= top:
-                    break
-                airport_info = airports[airport]
-                if airport_info.country == "Colombia":
-                    top_n_airports.append((airport_info.name, airport_info.icao, airport_info.city, degree))
-        else:
-            airport_info = airports[degreeMap[degree]]
-            top_n_airports.append((airport_info.name, airport_info.icao, airport_info.city, degree))
+    # The general digraph holds the shortest flight between every pair of airports, so its induced
+    # subgraph is the graph of the flights between the top airports
+    with instrument.phase("top_n_mst.subgraph"):
+        top_icaos = [airport_info[1] for airport_info in top_n_airports]
+        graph = general_digraph.subgraph(top_icaos)
 
-    graph = Graph()
+    with instrument.phase("top_n_mst.mst"):
+        mst, distance, time = graph.prim(top_n_airports[0][1])
+    branches = mst.iter_branches(top_n_airports[0][1])
 
-    for airport_info in top_n_airports:
-        for flight in flights:
-            if flight.origin == airport_info[1]:
-                for airport_info2 in top_n_airports:
-                    if flight.destination == airport_info2[1]:
-                        graph.add_edge(airport_info[1], airport_info2[1], flight.flight_distance, flight.flight_duration)
+    return top_n_airports[0][1], graph.get_degree(top_n_airports[0][1]), branches, distance, time
 
-    mst, distance, time = graph.prim(top_n_airports[0][1])
-    branches = mst.find_branches(top_n_airports[0][1])
+def get_region_airports(country: str = None, cities: Iterable[str] = None) -> List[str]:
+    """
+    Gets the ICAO codes of the airports in a country and/or a list of cities, in load order.
 
-    return top_n_airports[0][1], graph.get_degree(top_n_airports[0][1]), branches, distance, time
+    Parameters:
+    country (str): If given, only airports in this country are returned.
+    cities (Iterable[str]): If given, only airports in one of these cities are returned.
+
+    Returns:
+    List[str]: The ICAO codes of the matching airports.
+    """
+    cities = None if cities is None else set(cities)
+    return [
+        icao for icao, airport in airports.items()
+        if (country is None or airport.country == country) and (cities is None or airport.city in cities)
+    ]
+
+def regional_graph(graph: Graph, country: str = None, cities: Iterable[str] = None) -> Graph:
+    """
+    Extracts the subgraph of a graph induced by the airports in a country and/or a list of cities.
+
+    Parameters:
+    graph (Graph): The graph to extract from.
+    country (str): If given, only airports in this country are kept.
+    cities (Iterable[str]): If given, only airports in one of these cities are kept.
+
+    Returns:
+    Graph: The induced subgraph.
+    """
+    return graph.subgraph(get_region_airports(country, cities))
 
-def shortest_path(origin_lat: float, origin_lon: float, destination_lat: float, destination_lon: float) -> Tuple[List[Tuple[str, str, float, float, float, float]], float, float]:
+def get_region_flights(icaos: Iterable[str]) -> array:
     """
-    Finds the shortest path from the origin to the destination using Dijkstra's algorithm.
+    Gets the flights whose origin and destination are both among the given airports, looked up
+    through the flight table's per-origin index.
+
+    Parameters:
+    icaos (Iterable[str]): The ICAO codes of the airports.
+
+    Returns:
+    array: The row indices of the matching flights in the flight table.
+    """
+    icaos = set(icaos)
+    return flights.select({"origin": icaos, "destination": icaos})
+
+def shortest_path(origin_lat: float, origin_lon: float, destination_lat: float, destination_lon: float, metric: str = "duration", stats: dict = None) -> Tuple[List[Tuple[str, str, float, float, float, float]], float, float]:
+    """
+    Finds the shortest path from the origin to the destination. Paths minimizing flight time are read from
+    the commercial routing table when one is built and current (see build_routing_table), and otherwise
+    found with bidirectional Dijkstra over the graph's compact copy (see get_compact_graph); paths minimizing distance
+    use A* guided by the great-circle distance to the destination airport. All return the same cost as plain Dijkstra.
+    The "mean_duration" and "median_duration" metrics minimize the typical flight time of each route instead,
+    searching the graph weighted by those route statistics (see weighted_graph).
 
     Parameters:
     origin_lat (float): The latitude of the origin.
     origin_lon (float): The longitude of the origin.
     destination_lat (float): The latitude of the destination.
     destination_lon (float): The longitude of the destination.
+    metric (str): The cost to minimize, "duration", "distance", "mean_duration" or "median_duration".
+    stats (dict): If given, receives the search algorithm used and the number of expanded nodes.
 
     Returns:
     Tuple[List[Tuple[str, str, float, float, float, float]], float, float]: The path information, total distance, and total time.
     """
-    origin_airport = find_nearest_airport(origin_lat, origin_lon)
-    destination_airport = find_nearest_airport(destination_lat, destination_lon)
+    if metric not in ("duration", "distance", "mean_duration", "median_duration"):
+        raise ValueError(f"Métrica no válida: {metric}")
+
+    with instrument.phase("shortest_path.nearest_airport"):
+        origin_airport = find_nearest_airport(origin_lat, origin_lon)
+        destination_airport = find_nearest_airport(destination_lat, destination_lon)
 
     if origin_airport is None or destination_airport is None:
         return [], 0, 0
+    elif not _may_reach(commercial_digraph, origin_airport.icao, destination_airport.icao):
+        instrument.count("shortest_path.unreachable")
+        if stats is not None:
+            stats["algorithm"] = "reachability"
+            stats["expanded"] = 0
+        return [], 0, 0
     else:
-        path = commercial_digraph.dijkstra(origin_airport.icao, destination_airport.icao)
+        key = ("commercial_digraph", origin_airport.icao, destination_airport.icao, metric)
+        version = commercial_digraph.version
+        if metric in ("mean_duration", "median_duration"):
+            version = (version, route_stats["commercial"].version)
+        result = result_cache.get(key, version)
+        if result is not MISS:
+            instrument.count("shortest_path.cache_hits")
+            if stats is not None:
+                stats["algorithm"] = "cache"
+                stats["expanded"] = 0
+            return result
+
+        if stats is None and instrument.enabled:
+            stats = {}
+        result = _shortest_route(origin_airport.icao, destination_airport.icao, metric, stats)
+        if stats is not None:
+            instrument.add_stats(stats)
+        result_cache.put(key, version, result)
+        return result
+
+def route_matrix(origins: List[Tuple[float, float]], destinations: List[Tuple[float, float]], processes: int = None, graph_name: str = "commercial_digraph") -> RouteMatrix:
+    """
+    Finds the fastest route from every origin to every destination at once, as shortest_path does for one
+    pair with the "duration" metric. All the coordinates are resolved to their nearest airports in one
+    call, and a single one-to-all search is run per distinct origin airport, spread over a process pool.
+
+    Parameters:
+    origins (List[Tuple[float, float]]): The latitude and longitude of each origin.
+    destinations (List[Tuple[float, float]]): The latitude and longitude of each destination.
+    processes (int): The size of the process pool running the searches (defaults to the CPU count; 1 runs them in this process).
+    graph_name (str): The name of the graph, e.g. "commercial_digraph".
+
+    Returns:
+    RouteMatrix: The dense distance, duration and stop-count matrices (row per origin, column per destination).
+    matrix_route rebuilds the route of any cell.
+    """
+    with instrument.phase("route_matrix.nearest_airport"):
+        resolved = find_nearest_airports(list(origins) + list(destinations))
+    icaos = [None if airport is None else airport.icao for airport in resolved]
+
+    with instrument.phase("route_matrix.search"):
+        csr = get_compact_graph(graph_name)
+        return RouteMatrix.build(csr, icaos[:len(origins)], icaos[len(origins):], processes)
 
-        airports_info = path[0]
-        weights = path[1]
+def matrix_route(matrix: RouteMatrix, i: int, j: int) -> Tuple[List[Tuple[str, str, float, float, float, float]], float, float]:
+    """
+    Rebuilds the route of a cell of a route matrix.
+
+    Parameters:
+    matrix (RouteMatrix): A matrix returned by route_matrix.
+    i (int): The index of the origin.
+    j (int): The index of the destination.
+
+    Returns:
+    Tuple[List[Tuple[str, str, float, float, float, float]], float, float]: The path information, total distance, and
+    total time, as shortest_path returns them (an empty path when the cell has no route).
+    """
+    return _format_route(matrix.path(i, j))
+
+def _shortest_route(origin: str, destination: str, metric: str, stats: dict) -> Tuple[List[Tuple[str, str, float, float, float, float]], float, float]:
+    with instrument.phase("shortest_path.search"):
+        table = get_routing_table("commercial_digraph") if metric == "duration" else None
+        if table is not None:
+            path = table.path(origin, destination)
+            if stats is not None:
+                stats["algorithm"] = "routing_table"
+                stats["expanded"] = 0
+        elif metric == "duration":
+            path = get_compact_graph("commercial_digraph").bidirectional_dijkstra(origin, destination, stats)
+        elif metric in ("mean_duration", "median_duration"):
+            graph = weighted_graph("commercial_digraph", metric.split("_")[0])
+            path = graph.bidirectional_dijkstra(origin, destination, 1, stats)
+        else:
+            path = commercial_digraph.astar(
+                origin, destination, distance_heuristic(destination), 0, stats
+            )
+
+    with instrument.phase("shortest_path.format"):
+        return _format_route(path)
 
-        path_info = []
+def _format_route(path: Tuple[List[str], List[Tuple[float, float]], float, float]) -> Tuple[List[Tuple[str, str, float, float, float, float]], float, float]:
+    airports_info = path[0]
+    weights = path[1]
 
-        distance = 0
-        time = 0
+    path_info = []
 
-        for i in range(len(airports_info) - 1):
-            edge = [
-                airports_info[i],
-                airports_info[i + 1],
-                weights[i][0],
-                weights[i][1],
-                distance + weights[i][0],
-                time + weights[i][1]
-            ]
-            distance += weights[i][0]
-            time += weights[i][1]
+    distance = 0
+    time = 0
 
-            path_info.append(edge)
+    for i in range(len(airports_info) - 1):
+        edge = [
+            airports_info[i],
+            airports_info[i + 1],
+            weights[i][0],
+            weights[i][1],
+            distance + weights[i][0],
+            time + weights[i][1]
+        ]
+        distance += weights[i][0]
+        time += weights[i][1]
 
-        return path_info, distance, time
+        path_info.append(edge)
+
+    return path_info, distance, time
+
+def distance_heuristic(destination: str):
+    """
+    Builds an A* heuristic for the distance metric: the great-circle distance from an airport to the destination.
+    Flight distances are great-circle distances too, so it never overestimates; it is shrunk by a relative
+    1e-9 so floating point rounding cannot make it exceed an edge's distance.
+
+    Parameters:
+    destination (str): The ICAO code of the destination airport.
+
+    Returns:
+    Callable[[str], float]: The heuristic, from ICAO code to kilometers.
+    """
+    target = (airports[destination].latitude, airports[destination].longitude)
+    return lambda icao: haversine((airports[icao].latitude, airports[icao].longitude), target) * (1 - 1e-9)
@@ -0,0 +1,140 @@
+from itertools import islice
+from queue import Queue, Full
+from threading import Event, Thread
+
+# Fields of a flight CSV line
+FIELDS = 8
+
+class Pipeline:
+    """
+    Streaming ingestion of a flight CSV as consecutive generator stages: chunked reads, parsing,
+    distance enrichment and loading into the registered sinks (the flight table, the graphs, any
+    aggregate). Only one chunk per stage is alive at a time, so no stage keeps the whole file.
+
+    With overlap enabled, reading, parsing and enrichment run in a background thread that hands
+    chunks over through a bounded queue, so the next chunk is parsed while the current one is being
+    inserted. Malformed lines and lines with unknown ICAO codes are set aside in rejects as
+    (line number, line, reason) instead of aborting the load.
+    """
+
+    def __init__(self, airports: dict, enrich, chunk_size: int = 50000, queue_size: int = 4):
+        self.airports = airports
+        # enrich(routes) returns the distance of every (origin, destination) ICAO pair
+        self.enrich = enrich
+        self.chunk_size = chunk_size
+        self.queue_size = queue_size
+        self.sinks = []
+        self.rejects = []
+        self.loaded = 0
+
+    def add_sink(self, sink) -> None:
+        """
+        Registers a callable that receives every chunk of enriched rows: tuples of the flight table's
+        columns (origin, origin city, destination, destination city, plane type, traffic, flight type,
+        duration, distance).
+        """
+        self.sinks.append(sink)
+
+    def run(self, file_path: str, overlap: bool = True) -> int:
+        """
+        Streams a flight CSV (with header) through the stages and the sinks. Returns the number of rows
+        loaded; rejected lines are in self.rejects.
+        """
+        return self.load(self.read_chunks(file_path), overlap)
+
+    def load(self, chunks, overlap: bool = True) -> int:
+        """
+        Runs chunks of raw lines, as (number of the chunk's first line, lines), through the parsing and
+        enrichment stages and the sinks. Returns the number of rows loaded so far.
+        """
+        chunks = self.enrich_chunks(self.parse_chunks(chunks))
+        if overlap:
+            chunks = self._prefetch(chunks)
+
+        for rows in chunks:
+            for sink in self.sinks:
+                sink(rows)
+            self.loaded += len(rows)
+        return self.loaded
+
+    def read_chunks(self, file_path: str):
+        # Yields (number of the chunk's first line, lines), skipping the header
+        with open(file_path, 'r') as file:
+            next(file, None)
+            line_number = 2
+            while True:
+                lines = list(islice(file, self.chunk_size))
+                if not lines:
+                    return
+                yield line_number, lines
+                line_number += len(lines)
+
+    def parse_chunks(self, chunks):
+        airports = self.airports
+        for line_number, lines in chunks:
+            rows = []
+            for offset, line in enumerate(lines):
+                flight_data = line.strip().split(';')
+                reason = None
+                if len(flight_data) != FIELDS:
+                    reason = f"Se esperaban {FIELDS} campos y hay {len(flight_data)}."
+                elif flight_data[0] not in airports:
+                    reason = f"Aeropuerto de origen desconocido: {flight_data[0]}"
+                elif flight_data[2] not in airports:
+                    reason = f"Aeropuerto de destino desconocido: {flight_data[2]}"
+                else:
+                    try:
+                        duration = int(flight_data[7])
+                    except ValueError:
+                        reason = f"Tiempo de vuelo no válido: {flight_data[7]}"
+
+                if reason is None:
+                    rows.append(tuple(flight_data[:7]) + (duration,))
+                elif line.strip():
+                    self.rejects.append((line_number + offset, line.rstrip("\n"), reason))
+            yield rows
+
+    def enrich_chunks(self, chunks):
+        for rows in chunks:
+            if rows:
+                distances = self.enrich([(row[0], row[2]) for row in rows])
+                yield [row + (distance,) for row, distance in zip(rows, distances)]
+
+    def _prefetch(self, chunks):
+        # Runs the producing stages in a thread, at most queue_size chunks ahead of the consumer
+        queue = Queue(self.queue_size)
+        stopped = Event()
+        done = object()
+
+        def put(item) -> bool:
+            while not stopped.is_set():
+                try:
+                    queue.put(item, timeout=0.1)
+                    return True
+                except Full:
+                    pass
+            return False
+
+        def produce():
+            try:
+                for rows in chunks:
+                    if not put(rows):
+                        return
+                put(done)
+            except BaseException as error:
+                put(error)
+
+        producer = Thread(target=produce, daemon=True)
+        producer.start()
+        try:
+            while True:
+                rows = queue.get()
+                if rows is done:
+                    break
+                if isinstance(rows, BaseException):
+                    raise rows
+                yield rows
+        finally:
+            # Also reached when the consumer fails or stops early, so the producer never blocks forever
+            stopped.set()
+            producer.join()
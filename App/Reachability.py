@@ -0,0 +1,131 @@
+class Reachability:
+    """
+    Reachability index of a graph, built for the graph's current version.
+
+    Directed graphs are split into strongly connected components with an iterative Tarjan, which
+    numbers the components in reverse topological order of their condensation DAG. The transitive
+    closure of the DAG is then one bitset (a Python int) per component, so "is B reachable from A"
+    is a single bit test. Undirected graphs only need their connected components.
+    """
+
+    def __init__(self, graph):
+        self.directed = graph.directed
+        self.version = graph.version
+        # Component id of every vertex, and the vertices of every component
+        self.component = {}
+        self.members = []
+        # Condensation DAG (successor component ids) and the components reachable from each one
+        self.successors = []
+        self.closure = []
+
+        if self.directed:
+            self._strongly_connected(graph.vertices)
+            self._condense(graph.vertices)
+        else:
+            self._connected(graph.vertices)
+
+    def reachable(self, start: str, goal: str) -> bool:
+        if start not in self.component or goal not in self.component:
+            return False
+        if not self.directed:
+            return self.component[start] == self.component[goal]
+        return bool(self.closure[self.component[start]] >> self.component[goal] & 1)
+
+    def components(self) -> list:
+        # Vertices of every component, largest first
+        return sorted(self.members, key=len, reverse=True)
+
+    def report(self) -> dict:
+        sizes = sorted((len(members) for members in self.members), reverse=True)
+        report = {
+            "directed": self.directed,
+            "vertices": len(self.component),
+            "components": len(sizes),
+            "largest": sizes[0] if sizes else 0,
+            "singletons": sum(1 for size in sizes if size == 1),
+            "sizes": sizes,
+        }
+        if self.directed:
+            predecessors = set(component for successors in self.successors for component in successors)
+            report["condensation_edges"] = sum(len(successors) for successors in self.successors)
+            report["sources"] = len(self.members) - len(predecessors)
+            report["sinks"] = sum(1 for successors in self.successors if not successors)
+        return report
+
+    def _connected(self, vertices: dict) -> None:
+        for root in vertices:
+            if root in self.component:
+                continue
+            component = len(self.members)
+            self.component[root] = component
+            members = [root]
+            for vertex in members:
+                for neighbor in vertices[vertex]:
+                    if neighbor not in self.component:
+                        self.component[neighbor] = component
+                        members.append(neighbor)
+            self.members.append(members)
+
+    def _strongly_connected(self, vertices: dict) -> None:
+        index = {}
+        low = {}
+        stack = []
+        on_stack = set()
+
+        for root in vertices:
+            if root in index:
+                continue
+
+            index[root] = low[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(vertices[root]))]
+
+            while work:
+                vertex, neighbors = work[-1]
+                descended = False
+                for neighbor in neighbors:
+                    if neighbor not in index:
+                        index[neighbor] = low[neighbor] = len(index)
+                        stack.append(neighbor)
+                        on_stack.add(neighbor)
+                        work.append((neighbor, iter(vertices[neighbor])))
+                        descended = True
+                        break
+                    if neighbor in on_stack:
+                        low[vertex] = min(low[vertex], index[neighbor])
+                if descended:
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[vertex])
+
+                if low[vertex] == index[vertex]:
+                    component = len(self.members)
+                    members = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        self.component[member] = component
+                        members.append(member)
+                        if member == vertex:
+                            break
+                    members.reverse()
+                    self.members.append(members)
+
+    def _condense(self, vertices: dict) -> None:
+        self.successors = [set() for members in self.members]
+        for vertex, neighbors in vertices.items():
+            component = self.component[vertex]
+            for neighbor in neighbors:
+                if self.component[neighbor] != component:
+                    self.successors[component].add(self.component[neighbor])
+
+        # Tarjan emits a component only after every component it reaches, so successors are already closed
+        for component, successors in enumerate(self.successors):
+            reach = 1 << component
+            for successor in successors:
+                reach |= self.closure[successor]
+            self.closure.append(reach)
@@ -0,0 +1,61 @@
+from collections import OrderedDict
+
+# Returned by get when there is no valid entry, since None can be a cached result
+MISS = object()
+
+class ResultCache:
+    """
+    Bounded least-recently-used cache of query results.
+
+    Every entry remembers the version of the graph it was computed on; reading it back with a
+    different version counts as a miss and drops the entry, so a changed graph never serves stale
+    results. Hits, misses and evictions are counted to help size the cache.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key, version: int):
+        entry = self.entries.get(key)
+        if entry is None or entry[0] != version:
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return MISS
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key, version: int, value) -> None:
+        if self.maxsize <= 0:
+            return
+        self.entries[key] = (version, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,143 @@
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+from CSRGraph import CSRGraph
+
+class RouteMatrix:
+    """
+    Fastest routes from every origin to every destination of a many-to-many query.
+
+    The dense len(origins) x len(destinations) matrices hold, row by row, the duration of each cell's
+    fastest route, the distance flown along it and its number of flights (inf, inf and -1 when there is
+    no route, or when the origin or destination has no airport). One one-to-all Dijkstra is run per
+    distinct origin airport; its predecessor edges are kept, so any cell's path is rebuilt on demand.
+    """
+
+    def __init__(self, graph: CSRGraph, origins: list, destinations: list):
+        self.graph = graph
+        # Vertex labels of the rows and columns, None where a coordinate has no airport
+        self.origins = origins
+        self.destinations = destinations
+        size = len(origins) * len(destinations)
+        self.durations = array('d', [float('inf')]) * size
+        self.distances = array('d', [float('inf')]) * size
+        self.stops = array('i', [-1]) * size
+        # Predecessor edge of every vertex, by source vertex id
+        self.previous = {}
+
+    @classmethod
+    def build(cls, graph: CSRGraph, origins: list, destinations: list, processes: int = None):
+        """
+        Runs one-to-all Dijkstra from every distinct origin, spread over a process pool (processes=1 runs
+        in this process), and fills the matrices.
+        """
+        matrix = cls(graph, origins, destinations)
+        sources = sorted({graph.ids[origin] for origin in origins if origin in graph.ids})
+        if processes is None:
+            processes = os.cpu_count() or 1
+
+        if processes <= 1 or len(sources) < 2:
+            matrix._fill((source,) + graph.shortest_tree(source) for source in sources)
+        else:
+            processes = min(processes, len(sources))
+            with ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(graph,)) as executor:
+                matrix._fill(executor.map(_solve, sources, chunksize=max(1, len(sources) // (processes * 4))))
+
+        return matrix
+
+    def _fill(self, trees) -> None:
+        graph = self.graph
+        width = len(self.destinations)
+        rows = {}
+        for i, origin in enumerate(self.origins):
+            if origin in graph.ids:
+                rows.setdefault(graph.ids[origin], []).append(i)
+        columns = [(j, graph.ids[destination]) for j, destination in enumerate(self.destinations) if destination in graph.ids]
+
+        for source, durations, distances, previous in trees:
+            self.previous[source] = previous
+            first = rows[source][0] * width
+            hops = {}
+            for j, target in columns:
+                if durations[target] == float('inf'):
+                    continue
+                if target not in hops:
+                    hops[target] = self._hops(previous, target)
+                self.durations[first + j] = durations[target]
+                self.distances[first + j] = distances[target]
+                self.stops[first + j] = hops[target]
+
+            # Origins resolved to the same airport share the row
+            for i in rows[source][1:]:
+                row = i * width
+                self.durations[row:row + width] = self.durations[first:first + width]
+                self.distances[row:row + width] = self.distances[first:first + width]
+                self.stops[row:row + width] = self.stops[first:first + width]
+
+    def _hops(self, previous: array, target: int) -> int:
+        hops = 0
+        while previous[target] != -1:
+            target = self.graph._edge_tail(previous[target])
+            hops += 1
+        return hops
+
+    @property
+    def shape(self) -> tuple:
+        return len(self.origins), len(self.destinations)
+
+    def lookup(self, i: int, j: int):
+        """
+        Returns (distance, duration, stops) of cell (i, j)'s fastest route, or None when it has no route.
+        """
+        cell = self._cell(i, j)
+        if self.durations[cell] == float('inf'):
+            return None
+        return self.distances[cell], self.durations[cell], self.stops[cell]
+
+    def rows(self, matrix: array) -> list:
+        # One of the flat matrices (durations, distances or stops) as a list of rows
+        width = len(self.destinations)
+        return [matrix[i * width:(i + 1) * width].tolist() for i in range(len(self.origins))]
+
+    def path(self, i: int, j: int):
+        """
+        Rebuilds cell (i, j)'s fastest route in the same form as Graph.dijkstra: (path, path_weights,
+        total_weight1, total_weight2). A cell without a route gives an empty path.
+        """
+        if self.durations[self._cell(i, j)] == float('inf'):
+            return [], [], 0, 0
+
+        graph = self.graph
+        previous = self.previous[graph.ids[self.origins[i]]]
+        target = graph.ids[self.destinations[j]]
+
+        path = [self.destinations[j]]
+        path_weights = []
+        while previous[target] != -1:
+            e = previous[target]
+            path_weights.append((graph.distances[e], graph.durations[e]))
+            target = graph._edge_tail(e)
+            path.append(graph.labels[target])
+        path.reverse()
+        path_weights.reverse()
+
+        total_weight1 = sum(weight1 for weight1, weight2 in path_weights)
+        total_weight2 = sum(weight2 for weight1, weight2 in path_weights)
+
+        return path, path_weights, total_weight1, total_weight2
+
+    def _cell(self, i: int, j: int) -> int:
+        if not 0 <= i < len(self.origins) or not 0 <= j < len(self.destinations):
+            raise IndexError("Celda fuera de la matriz de rutas.")
+        return i * len(self.destinations) + j
+
+# Graph of the current pool worker, set once per process by the pool initializer
+_worker_graph = None
+
+def _init_worker(graph: CSRGraph) -> None:
+    global _worker_graph
+    _worker_graph = graph
+
+def _solve(source: int):
+    return (source,) + _worker_graph.shortest_tree(source)
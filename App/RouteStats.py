@@ -0,0 +1,283 @@
+from array import array
+from math import sqrt
+
+from Graph import Graph
+
+STATISTICS = ("mean", "median")
+
+# Per-group arrays of Aggregates, stored as snapshot sections
+AGGREGATE_COLUMNS = ("count", "mean", "m2", "minimum", "maximum")
+
+class DurationStats:
+    """
+    Aggregate of a group of flights: count, min, max, mean and variance of the flight duration, a
+    histogram of durations for the median, and the flights by plane type and by traffic (N/I).
+    """
+    __slots__ = ("count", "mean", "m2", "minimum", "maximum", "durations", "plane_types", "traffic")
+
+    def __init__(self, count: int, mean: float, m2: float, minimum: int, maximum: int, durations: dict, plane_types: dict, traffic: dict):
+        self.count = count
+        self.mean = mean
+        # Sum of squared deviations from the mean
+        self.m2 = m2
+        self.minimum = minimum
+        self.maximum = maximum
+        self.durations = durations
+        self.plane_types = plane_types
+        self.traffic = traffic
+
+    def merge(self, other: "DurationStats") -> "DurationStats":
+        # Aggregate of both groups, leaving this one unchanged
+        merged = DurationStats(
+            self.count, self.mean, self.m2, self.minimum, self.maximum,
+            dict(self.durations), dict(self.plane_types), dict(self.traffic)
+        )
+        merged.update(other)
+        return merged
+
+    def update(self, other: "DurationStats") -> None:
+        # Adds the other group's flights, combining the moments with Chan's formula
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.mean += delta * other.count / count
+        self.count = count
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        for counts, theirs in ((self.durations, other.durations), (self.plane_types, other.plane_types), (self.traffic, other.traffic)):
+            for value, times in theirs.items():
+                counts[value] = counts.get(value, 0) + times
+
+    @property
+    def variance(self) -> float:
+        # Sample variance, 0 for a single flight
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def median(self) -> float:
+        lower, upper = (self.count - 1) // 2, self.count // 2
+        seen = 0
+        low = None
+        for duration in sorted(self.durations):
+            seen += self.durations[duration]
+            if low is None and seen > lower:
+                low = duration
+            if seen > upper:
+                return (low + duration) / 2
+
+    def statistic(self, name: str) -> float:
+        if name == "mean":
+            return self.mean
+        if name == "median":
+            return self.median()
+        raise ValueError(f"Estadística no válida: {name}")
+
+    def summary(self) -> dict:
+        return {
+            "flights": self.count,
+            "min_duration": self.minimum,
+            "max_duration": self.maximum,
+            "mean_duration": self.mean,
+            "variance": self.variance,
+            "stdev": sqrt(self.variance),
+            "median_duration": self.median(),
+            "plane_types": dict(sorted(self.plane_types.items(), key=lambda item: (-item[1], item[0]))),
+            "traffic": dict(sorted(self.traffic.items())),
+        }
+
+class Aggregates:
+    """
+    DurationStats of many groups of flights (routes), updated one flight at a time and stored by
+    column: a group's moments are array entries, its mean and variance kept with Welford's update. Most
+    routes have few flights, so a group's histograms are only created when it gets its second flight;
+    until then its first flight's plane type and traffic are enough.
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.count = array('q')
+        self.mean = array('d')
+        self.m2 = array('d')
+        self.minimum = array('q')
+        self.maximum = array('q')
+        self.plane_type = []
+        self.traffic = []
+        # (durations, plane types, traffic) histograms by group id, for the groups with more than one flight
+        self.histograms = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, key) -> bool:
+        return key in self.ids
+
+    def add(self, key, duration: int, plane_type: str, traffic: str) -> None:
+        group = self.ids.get(key)
+        if group is None:
+            self.ids[key] = len(self.count)
+            self.count.append(1)
+            self.mean.append(duration)
+            self.m2.append(0.0)
+            self.minimum.append(duration)
+            self.maximum.append(duration)
+            self.plane_type.append(plane_type)
+            self.traffic.append(traffic)
+            return
+
+        count = self.count[group] + 1
+        if count == 2:
+            # The first flight's duration is still the group's minimum (and maximum)
+            histograms = ({self.minimum[group]: 1}, {self.plane_type[group]: 1}, {self.traffic[group]: 1})
+            self.histograms[group] = histograms
+        else:
+            histograms = self.histograms[group]
+        durations, plane_types, traffics = histograms
+        durations[duration] = durations.get(duration, 0) + 1
+        plane_types[plane_type] = plane_types.get(plane_type, 0) + 1
+        traffics[traffic] = traffics.get(traffic, 0) + 1
+
+        self.count[group] = count
+        mean = self.mean[group]
+        delta = duration - mean
+        mean += delta / count
+        self.m2[group] += delta * (duration - mean)
+        self.mean[group] = mean
+        if duration < self.minimum[group]:
+            self.minimum[group] = duration
+        elif duration > self.maximum[group]:
+            self.maximum[group] = duration
+
+    def restore(self, keys: list, plane_types: list, traffic: list, histograms: dict, columns: dict) -> None:
+        # Replaces the groups with ones saved in a snapshot; the columns are copied, since they keep growing
+        self.ids = {key: group for group, key in enumerate(keys)}
+        for column in AGGREGATE_COLUMNS:
+            view = memoryview(columns[column])
+            data = array(view.format)
+            data.frombytes(view.cast("B"))
+            setattr(self, column, data)
+        self.plane_type = list(plane_types)
+        self.traffic = list(traffic)
+        self.histograms = histograms
+
+    def get(self, key) -> DurationStats:
+        # The group's DurationStats, or None if it has no flights; the histograms are the group's own
+        group = self.ids.get(key)
+        if group is None:
+            return None
+        if group in self.histograms:
+            histograms = self.histograms[group]
+        else:
+            histograms = ({self.minimum[group]: 1}, {self.plane_type[group]: 1}, {self.traffic[group]: 1})
+        return DurationStats(
+            self.count[group], self.mean[group], self.m2[group], self.minimum[group], self.maximum[group], *histograms
+        )
+
+class RouteStats:
+    """
+    Flight aggregates by route, updated flight by flight as the flights are ingested, so a route's figures
+    are a dictionary lookup instead of a scan of the flight table. An airport's departures and arrivals are
+    the merge of its routes' aggregates. rows counts the flight table rows already added.
+    """
+
+    def __init__(self):
+        self.routes = Aggregates()
+        # Destinations by origin and origins by destination of the routes with flights
+        self.destinations = {}
+        self.origins = {}
+        self.rows = 0
+        # Bumped on every flight added, so graphs weighted by these statistics can tell they are stale
+        self.version = 0
+
+    def clear(self) -> None:
+        version = self.version
+        self.__init__()
+        self.version = version + 1
+
+    def add(self, origin: str, destination: str, plane_type: str, traffic: str, duration: int) -> None:
+        route = (origin, destination)
+        if route not in self.routes:
+            self.destinations.setdefault(origin, []).append(destination)
+            self.origins.setdefault(destination, []).append(origin)
+        self.routes.add(route, duration, plane_type, traffic)
+        self.version += 1
+
+    def snapshot(self) -> tuple:
+        """
+        Returns (metadata, sections) to store the statistics in a snapshot: the routes, plane types, traffic
+        and histograms as JSON-serializable metadata, and the per-route arrays as sections.
+        """
+        routes = self.routes
+        metadata = {
+            "routes": [list(route) for route in routes.ids],
+            "plane_types": routes.plane_type,
+            "traffic": routes.traffic,
+            "histograms": [
+                [group, list(durations.items()), list(plane_types.items()), list(traffic.items())]
+                for group, (durations, plane_types, traffic) in routes.histograms.items()
+            ],
+            "rows": self.rows,
+        }
+        return metadata, {column: getattr(routes, column) for column in AGGREGATE_COLUMNS}
+
+    def restore(self, metadata: dict, sections: dict) -> None:
+        """
+        Replaces the statistics with ones stored by snapshot.
+        """
+        self.clear()
+        routes = [tuple(route) for route in metadata["routes"]]
+        histograms = {
+            group: (dict(map(tuple, durations)), dict(map(tuple, plane_types)), dict(map(tuple, traffic)))
+            for group, durations, plane_types, traffic in metadata["histograms"]
+        }
+        self.routes.restore(routes, metadata["plane_types"], metadata["traffic"], histograms, sections)
+        for origin, destination in routes:
+            self.destinations.setdefault(origin, []).append(destination)
+            self.origins.setdefault(destination, []).append(origin)
+        self.rows = metadata["rows"]
+
+    def route(self, origin: str, destination: str, directed: bool = True) -> DurationStats:
+        """
+        Returns the aggregate of the flights from origin to destination (in either direction if not
+        directed), or None when there are none.
+        """
+        stats = self.routes.get((origin, destination))
+        if directed or origin == destination:
+            return stats
+        back = self.routes.get((destination, origin))
+        if stats is None or back is None:
+            return stats or back
+        return stats.merge(back)
+
+    def airport(self, icao: str) -> tuple:
+        """
+        Returns the aggregates of the flights departing from and arriving at an airport, merged from its
+        routes in time proportional to its number of routes; either is None without flights.
+        """
+        departures = [self.routes.get((icao, destination)) for destination in self.destinations.get(icao, ())]
+        arrivals = [self.routes.get((origin, icao)) for origin in self.origins.get(icao, ())]
+        return _merge_all(departures), _merge_all(arrivals)
+
+    def weighted(self, graph: Graph, statistic: str = "mean") -> Graph:
+        """
+        Returns a copy of graph whose second weight (duration) is the mean or median duration of each
+        route's flights instead of the duration of its shortest flight. Distances and neighbor order are
+        kept, so the graph algorithms run on it as on the original.
+        """
+        if statistic not in STATISTICS:
+            raise ValueError(f"Estadística no válida: {statistic}")
+        weighted = Graph(graph.directed)
+        for vertex in graph.get_vertices():
+            weighted.add_vertex(vertex)
+        for vertex1, neighbors in graph.vertices.items():
+            for vertex2, (weight1, weight2) in neighbors.items():
+                stats = self.route(vertex1, vertex2, graph.directed)
+                weighted._link(vertex1, vertex2, weight1, weight2 if stats is None else stats.statistic(statistic))
+        return weighted
+
+def _merge_all(stats: list) -> DurationStats:
+    # Aggregate of several groups, or None for none; the groups are left unchanged
+    if len(stats) < 2:
+        return stats[0] if stats else None
+    merged = stats[0].merge(stats[1])
+    for group in stats[2:]:
+        merged.update(group)
+    return merged
@@ -0,0 +1,151 @@
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+from CSRGraph import CSRGraph, max_value
+from Snapshot import save_snapshot, load_snapshot
+
+# Version of the table layout, part of the cache key so tables saved in an older layout are rebuilt
+LAYOUT = 2
+
+class RoutingTable:
+    """
+    Precomputed shortest-duration routes between every pair of vertices of a graph.
+
+    Row i of the n x n matrices holds the one-to-all Dijkstra result from vertex i: the path durations, in
+    the integer width of the graph's durations, and the id of the vertex each path reaches its destination
+    from, in 16 bits when the graph has fewer than 32768 vertices. Any route is then read in O(1) and rebuilt
+    in O(path length) by following the predecessors; the distance flown is summed along the way.
+    """
+
+    def __init__(self, graph: CSRGraph):
+        self.graph = graph
+        self.fingerprint = graph.fingerprint()
+        size = len(graph.labels)
+        self.unreachable = max_value(graph.durations.typecode)
+        self.durations = array(graph.durations.typecode, [self.unreachable]) * (size * size)
+        self.parents = array(vertex_typecode(size), [-1]) * (size * size)
+
+    @classmethod
+    def build(cls, graph: CSRGraph, processes: int = None):
+        """
+        Runs one-to-all Dijkstra from every vertex, spread over a process pool (processes=1 runs in this process).
+        """
+        table = cls(graph)
+        size = len(graph.labels)
+        typecode = table.parents.typecode
+        if processes is None:
+            processes = os.cpu_count() or 1
+
+        if processes <= 1 or size < 2:
+            trees = map(lambda source: (source,) + graph.duration_tree(source, typecode), range(size))
+            table._fill(trees)
+        else:
+            with ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(graph,)) as executor:
+                table._fill(executor.map(_solve, range(size), [typecode] * size, chunksize=max(1, size // (processes * 4))))
+
+        return table
+
+    def _fill(self, trees) -> None:
+        size = len(self.graph.labels)
+        for source, durations, parents in trees:
+            row = source * size
+            self.durations[row:row + size] = durations
+            self.parents[row:row + size] = parents
+
+    def lookup(self, origin: str, destination: str):
+        """
+        Returns (distance, duration) of the fastest route, or None when the destination is unreachable.
+        """
+        cell = self._cell(origin, destination)
+        if self.durations[cell] == self.unreachable:
+            return None
+        return self.path(origin, destination)[2], self.durations[cell]
+
+    def path(self, origin: str, destination: str):
+        """
+        Rebuilds the fastest route in the same form as Graph.dijkstra: (path, path_weights, total_weight1, total_weight2).
+        """
+        graph = self.graph
+        size = len(graph.labels)
+        row = graph.ids[origin] * size
+        vertex = graph.ids[destination]
+        cell = self._cell(origin, destination)
+
+        path = [destination]
+        path_weights = []
+        while self.parents[cell] != -1:
+            parent = self.parents[cell]
+            e = graph._edge(parent, vertex)
+            path_weights.append((graph.distances[e], graph.durations[e]))
+            path.append(graph.labels[parent])
+            vertex = parent
+            cell = row + parent
+        path.reverse()
+        path_weights.reverse()
+
+        total_weight1 = sum(weight1 for weight1, weight2 in path_weights)
+        total_weight2 = sum(weight2 for weight1, weight2 in path_weights)
+
+        return path, path_weights, total_weight1, total_weight2
+
+    def _cell(self, origin: str, destination: str) -> int:
+        if origin not in self.graph.ids or destination not in self.graph.ids:
+            raise ValueError("Los vértices inicial y/o final no están en el grafo.")
+        return self.graph.ids[origin] * len(self.graph.labels) + self.graph.ids[destination]
+
+    def save(self, file_path: str) -> None:
+        graph = self.graph
+        save_snapshot(
+            file_path,
+            {"fingerprint": self.fingerprint, "layout": LAYOUT},
+            {"directed": graph.directed, "labels": graph.labels},
+            {
+                "graph.offsets": graph.offsets,
+                "graph.neighbors": graph.neighbors,
+                "graph.distances": graph.distances,
+                "graph.durations": graph.durations,
+                "durations": self.durations,
+                "parents": self.parents,
+            }
+        )
+
+    @classmethod
+    def load(cls, file_path: str, fingerprint: str):
+        """
+        Loads a table saved for the graph with the given fingerprint, or returns None if there is none.
+        """
+        snapshot = load_snapshot(file_path, {"fingerprint": fingerprint, "layout": LAYOUT})
+        if snapshot is None:
+            return None
+        metadata, sections = snapshot
+
+        graph = CSRGraph(metadata["directed"])
+        graph.labels = metadata["labels"]
+        graph.ids = {label: i for i, label in enumerate(graph.labels)}
+        graph.offsets = sections["graph.offsets"]
+        graph.neighbors = sections["graph.neighbors"]
+        graph.distances = sections["graph.distances"]
+        graph.durations = sections["graph.durations"]
+
+        table = cls.__new__(cls)
+        table.graph = graph
+        table.fingerprint = fingerprint
+        table.unreachable = max_value(graph.durations.format)
+        table.durations = sections["durations"]
+        table.parents = sections["parents"]
+        return table
+
+# Graph of the current pool worker, set once per process by the pool initializer
+_worker_graph = None
+
+def _init_worker(graph: CSRGraph) -> None:
+    global _worker_graph
+    _worker_graph = graph
+
+def _solve(source: int, typecode: str):
+    return (source,) + _worker_graph.duration_tree(source, typecode)
+
+def vertex_typecode(size: int) -> str:
+    # The narrowest signed array typecode holding every vertex id of a graph with size vertices and -1
+    return 'h' if size < 1 << 15 else 'i'
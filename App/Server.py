@@ -0,0 +1,214 @@
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from urllib.parse import urlsplit, parse_qsl
+from math import ceil
+import asyncio
+import json
+import os
+import time
+
+import Logic
+from Batch import run_query, init_worker, load_flights
+
+# The service only listens on the loopback interface
+HOST = "127.0.0.1"
+
+# Latencies kept per endpoint for the percentiles of /metrics
+LATENCY_WINDOW = 1000
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+MST_REQUIREMENTS = {"commercial": 3, "cargo": 4, "military": 5}
+
+class Server:
+    """
+    Local HTTP/JSON service over the loaded data.
+
+    Requests are parsed on an asyncio event loop. Cheap lookups (nearest airport, degree rankings,
+    metrics) are answered on the loop itself, while route and MST queries are sent to a process pool
+    through Batch.run_query, so a slow MST never holds up the cheap endpoints. Every endpoint keeps
+    its request count, error count and recent latencies.
+    """
+
+    def __init__(self, airports_file: str, flights_file: str, port: int = 8080, processes: int = None, flights_dir: str = None, partitions: list = None):
+        self.airports_file = airports_file
+        self.flights_file = flights_file
+        # Flight partitions loaded instead of flights_file when flights_dir is given (see Batch.load_flights)
+        self.flights_dir = flights_dir
+        self.partitions = partitions
+        self.port = port
+        self.processes = processes or os.cpu_count() or 1
+        self.pool = None
+        self.server = None
+        self.metrics = {}
+
+        self.routes = {
+            "/health": self._health,
+            "/metrics": self._metrics,
+            "/nearest": self._nearest,
+            "/degrees": self._degrees,
+            "/route_stats": self._route_stats,
+            "/airport_stats": self._airport_stats,
+            "/path": self._path,
+            "/shortest_path": self._shortest_path,
+            "/mst": self._mst,
+            "/top_mst": self._top_mst,
+        }
+
+    async def start(self) -> None:
+        """
+        Loads the data (read_airports and stream_flights, or the snapshot when it is current, or the
+        flight partitions), starts the worker pool and begins listening.
+
+        The pool starts its workers on demand, and a worker forked while the server listens would inherit
+        the listening socket and the open connections, which then never see EOF when the server closes
+        them. Every worker is therefore started, with one no-op task each, before listening.
+        """
+        load_flights(self.airports_file, self.flights_file, self.flights_dir, self.partitions, self.processes)
+        self.pool = ProcessPoolExecutor(
+            self.processes, initializer=init_worker,
+            initargs=(self.airports_file, self.flights_file, dict(Logic.loaded_key), self.flights_dir, self.partitions)
+        )
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.pool, os.getpid) for _ in range(self.processes)))
+        self.server = await asyncio.start_server(self._handle, HOST, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        try:
+            await self.server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await reader.readline()
+            if not request_line:
+                return
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+            status, payload = await self._dispatch(method, target, body)
+        except (ValueError, asyncio.IncompleteReadError):
+            status, payload = 400, {"error": "Solicitud HTTP no válida."}
+
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: close\r\n\r\n".encode("latin-1") + data
+        )
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method: str, target: str, body: bytes):
+        url = urlsplit(target)
+        handler = self.routes.get(url.path)
+        if handler is None:
+            return 404, {"error": f"Ruta no encontrada: {url.path}"}
+        if method not in ("GET", "POST"):
+            return 405, {"error": f"Método no permitido: {method}"}
+
+        start = time.perf_counter()
+        try:
+            params = dict(parse_qsl(url.query))
+            if body:
+                params.update(json.loads(body))
+            status, payload = 200, await handler(params)
+        except (KeyError, ValueError, TypeError) as error:
+            status, payload = 400, {"error": f"{type(error).__name__}: {error}"}
+        except Exception as error:
+            status, payload = 500, {"error": f"{type(error).__name__}: {error}"}
+        self._record(url.path, status, time.perf_counter() - start)
+        return status, payload
+
+    def _record(self, endpoint: str, status: int, elapsed: float) -> None:
+        if endpoint not in self.metrics:
+            self.metrics[endpoint] = {"requests": 0, "errors": 0, "latencies": deque(maxlen=LATENCY_WINDOW)}
+        metrics = self.metrics[endpoint]
+        metrics["requests"] += 1
+        metrics["errors"] += status != 200
+        metrics["latencies"].append(elapsed * 1000)
+
+    async def _run(self, query: dict) -> dict:
+        return await asyncio.get_running_loop().run_in_executor(self.pool, run_query, query)
+
+    async def _health(self, params: dict) -> dict:
+        return {"status": "ok", "airports": len(Logic.airports), "flights": len(Logic.flights)}
+
+    async def _metrics(self, params: dict) -> dict:
+        report = {}
+        for endpoint, metrics in self.metrics.items():
+            latencies = sorted(metrics["latencies"])
+            report[endpoint] = {
+                "requests": metrics["requests"],
+                "errors": metrics["errors"],
+                "mean_ms": round(sum(latencies) / len(latencies), 3),
+                "p50_ms": round(_percentile(latencies, 0.5), 3),
+                "p95_ms": round(_percentile(latencies, 0.95), 3),
+                "max_ms": round(latencies[-1], 3),
+            }
+        return {"endpoints": report}
+
+    async def _nearest(self, params: dict) -> dict:
+        airport = Logic.find_nearest_airport(float(params["lat"]), float(params["lon"]))
+        if airport is None:
+            return {"airport": None}
+        return {"airport": {
+            "icao": airport.icao, "name": airport.name, "city": airport.city, "country": airport.country,
+            "latitude": airport.latitude, "longitude": airport.longitude,
+        }}
+
+    async def _degrees(self, params: dict) -> dict:
+        graph = Logic.graphs[params.get("graph", "general_digraph")]
+        n = int(params.get("n", 5))
+        ranking = Logic.get_bottom_airports if params.get("order") == "bottom" else Logic.get_top_airports
+        airports = ranking(graph, n, params.get("country"))
+        return {"airports": [
+            {"name": name, "icao": icao, "city": city, "degree": degree} for name, icao, city, degree in airports
+        ]}
+
+    async def _route_stats(self, params: dict) -> dict:
+        directed = str(params.get("directed", "true")).lower() != "false"
+        stats = Logic.get_route_stats(params["origin"], params["destination"], params.get("category", "general"), directed)
+        return {"route": stats}
+
+    async def _airport_stats(self, params: dict) -> dict:
+        return Logic.get_airport_stats(params["icao"], params.get("category", "general"))
+
+    async def _path(self, params: dict) -> dict:
+        return await self._run(dict(params, req=1))
+
+    async def _shortest_path(self, params: dict) -> dict:
+        return await self._run(dict(params, req=7))
+
+    async def _mst(self, params: dict) -> dict:
+        return await self._run(dict(params, req=MST_REQUIREMENTS[params.get("category", "commercial")]))
+
+    async def _top_mst(self, params: dict) -> dict:
+        return await self._run(dict(params, req=6))
+
+def _percentile(values: list, fraction: float) -> float:
+    # Nearest-rank percentile of an already sorted list
+    return values[max(0, ceil(fraction * len(values)) - 1)]
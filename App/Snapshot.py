@@ -0,0 +1,80 @@
+from array import array
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+MAGIC = b"CADASNAP"
+VERSION = 1
+
+# magic, format version, header length
+PREAMBLE = struct.Struct("<8sII")
+
+def file_hash(file_path: str) -> str:
+    """
+    Returns the SHA-256 hex digest of a file's content.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def save_snapshot(file_path: str, key: dict, metadata: dict, sections: dict) -> None:
+    """
+    Writes a snapshot file: a JSON header with the key, the metadata and the position of every
+    section, followed by the raw bytes of each section (an array.array, or a typed memoryview such as
+    load_snapshot returns). The file is written to a temporary path first, so readers never see a
+    partial snapshot.
+    """
+    layout = {}
+    offset = 0
+    for name, data in sections.items():
+        size = len(data) * data.itemsize
+        typecode = data.typecode if isinstance(data, array) else data.format
+        layout[name] = [typecode, offset, size]
+        offset += size + (-size % 8)
+
+    header = json.dumps({"key": key, "metadata": metadata, "sections": layout}).encode("utf-8")
+    header += b" " * (-(PREAMBLE.size + len(header)) % 8)
+
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    temporary_path = file_path + ".tmp"
+    with open(temporary_path, 'wb') as file:
+        file.write(PREAMBLE.pack(MAGIC, VERSION, len(header)))
+        file.write(header)
+        for name, data in sections.items():
+            file.write(data.tobytes())
+            file.write(b"\0" * (-layout[name][2] % 8))
+    os.replace(temporary_path, file_path)
+
+def load_snapshot(file_path: str, key: dict):
+    """
+    Maps a snapshot file into memory and returns (metadata, sections), or None when the file does
+    not exist, is not a snapshot of this format version, or was built for a different key. Sections
+    are read-only memoryviews over the mapping, cast to their array typecode, so nothing is copied
+    until it is read; the mapping stays open as long as any of them is referenced.
+    """
+    if not os.path.exists(file_path) or os.path.getsize(file_path) < PREAMBLE.size:
+        return None
+
+    with open(file_path, 'rb') as file:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, header_length = PREAMBLE.unpack_from(mapped, 0)
+    start = PREAMBLE.size + header_length
+    header = json.loads(mapped[PREAMBLE.size:start].decode("utf-8")) if magic == MAGIC and version == VERSION else None
+    if header is None or header["key"] != key:
+        mapped.close()
+        return None
+
+    view = memoryview(mapped)
+    sections = {
+        name: view[start + offset:start + offset + size].cast(typecode)
+        for name, (typecode, offset, size) in header["sections"].items()
+    }
+    return header["metadata"], sections
@@ -0,0 +1,158 @@
+from math import radians, sin, cos
+import heapq
+
+EARTH_RADIUS = 6371  # Radius of the Earth in kilometers
+
+class SpatialIndex:
+    """
+    Static k-d tree over points on the Earth's surface.
+
+    Points are stored as 3-D unit vectors, so the straight-line (chord) distance between two of
+    them grows monotonically with their great-circle distance and the tree can prune with plain
+    Euclidean bounds. Candidates are then ranked with the exact distance function given to build,
+    breaking ties by insertion order.
+    """
+
+    def __init__(self):
+        self.items = []
+        self.coordinates = []
+        self.points = []
+        self.tree = []
+        self.distance = None
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def build(self, items: list, coordinates: list, distance) -> None:
+        """
+        Builds the tree. items[i] is located at coordinates[i] = (latitude, longitude), and
+        distance((lat1, lon1), (lat2, lon2)) returns kilometers.
+        """
+        self.items = list(items)
+        self.coordinates = list(coordinates)
+        self.points = [to_unit_vector(lat, lon) for lat, lon in self.coordinates]
+        self.distance = distance
+
+        # Implicit tree: the node of range [lo, hi) is tree[(lo + hi) // 2], split on axis depth % 3
+        self.tree = list(range(len(self.items)))
+        stack = [(0, len(self.tree), 0)]
+        while stack:
+            lo, hi, depth = stack.pop()
+            if hi - lo <= 1:
+                continue
+            axis = depth % 3
+            self.tree[lo:hi] = sorted(self.tree[lo:hi], key=lambda i: self.points[i][axis])
+            mid = (lo + hi) // 2
+            stack.append((lo, mid, depth + 1))
+            stack.append((mid + 1, hi, depth + 1))
+
+    def within(self, lat: float, lon: float, radius: float) -> list:
+        """
+        Returns (item, distance) for every point at most radius km away, nearest first.
+        """
+        query = to_unit_vector(lat, lon)
+        limit = chord_length(radius) + 1e-9
+        limit_squared = limit * limit
+        points, tree = self.points, self.tree
+
+        candidates = []
+        stack = [(0, len(tree), 0)]
+        while stack:
+            lo, hi, depth = stack.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            index = tree[mid]
+            point = points[index]
+            if squared_distance(point, query) <= limit_squared:
+                candidates.append(index)
+
+            axis = depth % 3
+            delta = query[axis] - point[axis]
+            if delta <= limit:
+                stack.append((lo, mid, depth + 1))
+            if delta >= -limit:
+                stack.append((mid + 1, hi, depth + 1))
+
+        return self._rank(lat, lon, candidates, radius)
+
+    def k_nearest(self, lat: float, lon: float, k: int, radius: float = None) -> list:
+        """
+        Returns (item, distance) for the k nearest points, optionally limited to radius km, nearest first.
+        """
+        if k <= 0:
+            return []
+
+        query = to_unit_vector(lat, lon)
+        bound = float('inf') if radius is None else (chord_length(radius) + 1e-9) ** 2
+        points, tree = self.points, self.tree
+
+        # Max-heap (negated) of the best k squared chords found so far
+        best = []
+        stack = [(0, len(tree), 0)]
+        while stack:
+            lo, hi, depth = stack.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            index = tree[mid]
+            point = points[index]
+            d = squared_distance(point, query)
+            if d <= bound:
+                if len(best) < k:
+                    heapq.heappush(best, (-d, -index))
+                elif d < -best[0][0]:
+                    heapq.heapreplace(best, (-d, -index))
+
+            axis = depth % 3
+            delta = query[axis] - point[axis]
+            near, far = ((lo, mid), (mid + 1, hi)) if delta <= 0 else ((mid + 1, hi), (lo, mid))
+            worst = bound if len(best) < k else min(bound, -best[0][0])
+            # Chords rank like great-circle distances up to rounding, so keep a small margin
+            if delta * delta <= worst + 1e-12:
+                stack.append((far[0], far[1], depth + 1))
+            stack.append((near[0], near[1], depth + 1))
+
+        return self._rank(lat, lon, [-index for d, index in best], radius)[:k]
+
+    def nearest(self, lat: float, lon: float, radius: float = None):
+        """
+        Returns (item, distance) for the nearest point, optionally limited to radius km, or None.
+        """
+        if radius is not None:
+            found = self.within(lat, lon, radius)
+        else:
+            found = self.k_nearest(lat, lon, 1)
+        return found[0] if found else None
+
+    def nearest_many(self, coordinates: list, radius: float = None) -> list:
+        """
+        Resolves many (latitude, longitude) pairs at once; repeated coordinates are searched only once.
+        """
+        resolved = {}
+        results = []
+        for coordinate in coordinates:
+            if coordinate not in resolved:
+                resolved[coordinate] = self.nearest(coordinate[0], coordinate[1], radius)
+            results.append(resolved[coordinate])
+        return results
+
+    def _rank(self, lat: float, lon: float, candidates: list, radius: float) -> list:
+        ranked = []
+        for index in candidates:
+            distance = self.distance((lat, lon), self.coordinates[index])
+            if radius is None or distance <= radius:
+                ranked.append((distance, index))
+        ranked.sort()
+        return [(self.items[index], distance) for distance, index in ranked]
+
+def to_unit_vector(lat: float, lon: float) -> tuple:
+    lat, lon = radians(lat), radians(lon)
+    return (cos(lat) * cos(lon), cos(lat) * sin(lon), sin(lat))
+
+def chord_length(distance: float) -> float:
+    angle = min(distance / EARTH_RADIUS, 3.141592653589793)
+    return 2 * sin(angle / 2)
+
+def squared_distance(point1: tuple, point2: tuple) -> float:
+    return (point1[0] - point2[0]) ** 2 + (point1[1] - point2[1]) ** 2 + (point1[2] - point2[2]) ** 2
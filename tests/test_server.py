@@ -0,0 +1,44 @@
+import asyncio
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "App"))
+
+from Server import Server
+
+AIRPORTS_FILE = os.path.join(ROOT, "Data", "airports-2022.csv")
+FLIGHTS_FILE = os.path.join(ROOT, "Data", "fligths-2022.csv")
+
+class ServerSmokeTest(unittest.TestCase):
+    """
+    Starts the service on a free localhost port and talks plain HTTP to it, reading every response
+    until the server closes the connection, as a client of a "Connection: close" response may.
+    """
+
+    def test_pool_backed_responses_end_with_eof(self):
+        asyncio.run(self._exercise())
+
+    async def _exercise(self):
+        server = Server(AIRPORTS_FILE, FLIGHTS_FILE, port=0, processes=2)
+        await server.start()
+        try:
+            for target in ("/health", "/path?origin_lat=4.70&origin_lon=-74.14&destination_lat=6.16&destination_lon=-75.42", "/top_mst?top=3"):
+                status, body = await asyncio.wait_for(_get(server.port, target), timeout=30)
+                self.assertEqual(status, 200, body)
+        finally:
+            await server.close()
+
+async def _get(port: int, target: str) -> tuple:
+    # Sends a GET and reads the whole response up to EOF
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode("latin-1"))
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split(b" ", 2)[1]), body.decode("utf-8")
+
+if __name__ == "__main__":
+    unittest.main()